@@ -0,0 +1,163 @@
+import asyncio
+import time
+import httpx
+from ..config import settings
+from .breaker import CircuitBreaker
+from ..services.metrics import PROVIDER_ERRORS, PROVIDER_LATENCY, PROVIDER_REQUESTS
+
+RETRY_STATUSES = {502, 503, 504}
+
+class ProviderClient:
+    """Long-lived async client for a provider panel.
+
+    One instance per provider holds a keep-alive connection pool; call
+    ``start()`` once at startup and ``aclose()`` on shutdown.
+    """
+    name = "provider"
+
+    def __init__(self, base: str | None, token: str | None, *, pool_size: int | None = None,
+                 connect_timeout: float | None = None, read_timeout: float | None = None,
+                 max_retries: int | None = None, retry_backoff: float | None = None,
+                 breaker: CircuitBreaker | None = None):
+        self.base = base.rstrip("/") if base else None
+        self.token = token
+        self.pool_size = pool_size or settings.PROVIDER_POOL_SIZE
+        self.connect_timeout = connect_timeout or settings.PROVIDER_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.PROVIDER_READ_TIMEOUT
+        self.max_retries = settings.PROVIDER_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.PROVIDER_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.breaker = breaker
+        self._http: httpx.AsyncClient | None = None
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def start(self):
+        if self._http is None and self.base:
+            self._http = httpx.AsyncClient(
+                base_url=self.base,
+                headers=self._headers(),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            )
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _send(self, method: str, path: str, json: dict | None, op: str, timeout=None) -> httpx.Response:
+        t0 = time.perf_counter()
+        try:
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            r = await self._http.request(method, path, json=json, **kwargs)
+        except httpx.TransportError as e:
+            PROVIDER_ERRORS.labels(self.name, op, e.__class__.__name__).inc()
+            if self.breaker:
+                self.breaker.failure()
+            raise
+        finally:
+            PROVIDER_LATENCY.labels(self.name, op).observe(time.perf_counter() - t0)
+        PROVIDER_REQUESTS.labels(self.name, op, str(r.status_code)).inc()
+        if self.breaker and r.status_code >= 500:
+            self.breaker.failure()
+        elif self.breaker:
+            self.breaker.success()
+        return r
+
+    async def _request(self, method: str, path: str, *, op: str, json: dict | None = None,
+                       idempotent: bool = False) -> dict:
+        """Send a request and return the decoded JSON body or ``{"error": ...}``.
+
+        Connection failures are always retried since nothing reached the panel;
+        timeouts and 5xx responses are only retried for idempotent calls.
+        """
+        if not self.base:
+            return {"error": f"{self.name.upper()}_API_URL not set"}
+        if self._http is None:
+            await self.start()
+        attempt = 0
+        while True:
+            if self.breaker and not self.breaker.allow():
+                return {"error": f"{self.name} circuit open"}
+            try:
+                r = await self._send(method, path, json, op)
+                if idempotent and r.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+                if r.status_code >= 400:
+                    return {"error": f"HTTP {r.status_code}: {r.text[:200]}"}
+                return r.json()
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                err = e
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if not idempotent:
+                    return {"error": str(e) or e.__class__.__name__}
+                err = e
+            except ValueError as e:
+                return {"error": f"Invalid response: {e}"}
+            if attempt >= self.max_retries:
+                return {"error": str(err) or err.__class__.__name__}
+            await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+            attempt += 1
+
+    async def probe(self) -> bool:
+        """One health check without retries; feeds the breaker."""
+        if not self.base:
+            return False
+        if self._http is None:
+            await self.start()
+        try:
+            r = await self._send("GET", settings.PROVIDER_HEALTH_PATH, None, "health",
+                                 timeout=settings.PROVIDER_HEALTH_TIMEOUT)
+        except httpx.TransportError:
+            return False
+        return r.status_code < 500
+
+    async def create_user(self, username: str, password: str, quota_gb: float, days: int) -> dict:
+        payload = {"username": username, "password": password, "quota_gb": quota_gb, "days": days}
+        return await self._request("POST", "/users", op="create_user", json=payload)
+
+    async def get_usage(self, username: str) -> dict:
+        res = await self._request("GET", f"/users/{username}/usage", op="get_usage", idempotent=True)
+        if "error" in res:
+            return res
+        return {"username": username, "used_gb": _used_gb(res)}
+
+    async def get_usages(self, usernames: list[str], concurrency: int = 10) -> dict[str, float]:
+        """Fetch usage for many users with at most ``concurrency`` calls in flight.
+
+        Users whose lookup failed are left out of the result.
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(username):
+            async with sem:
+                return username, await self.get_usage(username)
+
+        out = {}
+        for username, res in await asyncio.gather(*(one(u) for u in usernames)):
+            if "error" not in res and res["used_gb"] is not None:
+                out[username] = res["used_gb"]
+        return out
+
+    async def disable_user(self, username: str) -> dict:
+        return await self._request("PUT", f"/users/{username}", op="disable_user",
+                                   json={"status": "disabled"}, idempotent=True)
+
+    async def disable_users(self, usernames: list[str], concurrency: int = 10) -> set[str]:
+        """Disable many users with at most ``concurrency`` calls in flight; returns the ones that succeeded."""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(username):
+            async with sem:
+                return username, await self.disable_user(username)
+
+        return {u for u, res in await asyncio.gather(*(one(u) for u in usernames)) if "error" not in res}
+
+
+def _used_gb(res: dict) -> float | None:
+    if res.get("used_gb") is not None:
+        return float(res["used_gb"])
+    if res.get("used_traffic") is not None:
+        return float(res["used_traffic"]) / 1024 ** 3
+    return None
@@ -0,0 +1,47 @@
+import time
+from ..config import settings
+
+class CircuitBreaker:
+    """Fail fast on a panel that keeps failing.
+
+    Opens after ``threshold`` consecutive failures (transport errors and 5xx).
+    While open every call is refused without touching the network; after
+    ``reset_seconds`` a single trial call is let through and its outcome
+    closes or re-opens the breaker. A successful health probe closes it too.
+    """
+
+    def __init__(self, threshold: int | None = None, reset_seconds: float | None = None):
+        self.threshold = threshold or settings.PROVIDER_BREAKER_THRESHOLD
+        self.reset_seconds = settings.PROVIDER_BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    @property
+    def closed(self) -> bool:
+        return self.opened_at is None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self._trial and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._trial = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self._trial = False
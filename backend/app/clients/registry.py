@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from ..config import settings
+from ..services import nodes
+from .base import ProviderClient
+from .breaker import CircuitBreaker
+from .marzban import MarzbanClient
+from .sanaei import SanaeiClient
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[str, ProviderClient] = {}
+
+async def start_clients():
+    for client in (MarzbanClient(breaker=CircuitBreaker()), SanaeiClient(breaker=CircuitBreaker())):
+        await client.start()
+        _clients[client.name] = client
+    await nodes.load_nodes()
+
+async def close_clients():
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
+    await nodes.close_nodes()
+
+def get_client(provider: str, node_id: int | None = None) -> ProviderClient | None:
+    """Client for an existing subscription: its pool node, or the settings panel when ``node_id`` is None."""
+    if node_id is not None:
+        node = nodes.get(node_id)
+        return node.client if node else None
+    return _clients.get(provider)
+
+def place(provider: str) -> tuple[ProviderClient, int | None]:
+    """Client and node id for a new ``provider`` user.
+
+    Providers with enabled pool nodes go to the least-loaded healthy one;
+    the rest use the single panel from settings. Raises LookupError when
+    there is nowhere to put the user.
+    """
+    if nodes.has_nodes(provider):
+        node = nodes.place(provider)
+        if node is None:
+            raise LookupError(f"No healthy {provider} node with free capacity")
+        return node.client, node.id
+    client = _clients.get(provider)
+    if client is None:
+        raise LookupError(f"Unknown provider: {provider}")
+    return client, None
+
+def release(node_id: int | None):
+    """Give back the slot ``place`` counted when creating the user failed."""
+    if node_id is not None:
+        nodes.release(node_id)
+
+async def check_health():
+    await nodes.load_nodes()
+    await asyncio.gather(nodes.probe_nodes(), *(c.probe() for c in _clients.values() if c.base))
+
+async def run_health_loop():
+    """Per-worker: every worker has its own breakers, so each probes for itself."""
+    while True:
+        await asyncio.sleep(settings.PROVIDER_HEALTH_INTERVAL_SECONDS)
+        try:
+            await check_health()
+        except Exception:
+            logger.exception("provider health check failed")
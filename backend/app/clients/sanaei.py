@@ -1,20 +1,8 @@
-import requests
 from ..config import settings
+from .base import ProviderClient
 
-class SanaeiClient:
-    def __init__(self):
-        self.base = settings.SANAEI_API_URL
-        self.token = settings.SANAEI_TOKEN
+class SanaeiClient(ProviderClient):
+    name = "sanaei"
 
-    def _headers(self):
-        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
-
-    def create_user(self, username: str, password: str, quota_gb: float, days: int) -> dict:
-        if not self.base:
-            return {"error": "SANAEI_API_URL not set"}
-        payload = {"username": username, "password": password, "quota_gb": quota_gb, "days": days}
-        try:
-            r = requests.post(f"{self.base.rstrip('/')}/users", json=payload, headers=self._headers(), timeout=15)
-            return r.json()
-        except Exception as e:
-            return {"error": str(e)}
+    def __init__(self, **kwargs):
+        super().__init__(settings.SANAEI_API_URL, settings.SANAEI_TOKEN, **kwargs)
@@ -7,16 +7,96 @@ class Settings(BaseSettings):
     APP_SECRET: str = "change-this-secret"
     CORS_ORIGINS: List[str] = ["http://localhost:5173"]
     DATABASE_URL: str = "sqlite:///./vpnpanel.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    WEB_HOST: str = "127.0.0.1"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0  # 0 = one per available CPU
+    WEB_MAX_WORKERS: int = 8
+    WEB_KEEPALIVE_SECONDS: int = 5
+    WEB_BACKLOG: int = 2048
+    WEB_LIMIT_CONCURRENCY: int = 0  # per worker; 0 = unlimited, excess requests get 503
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    WEB_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    WEB_PREINITIALIZED: bool = False  # set by app.serve once it has migrated and seeded; workers then skip both
+    LEADER_LOCK_PATH: str | None = None  # default: per-database file in the temp dir
+    LEADER_RETRY_SECONDS: float = 15.0
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None  # when set, /metrics requires "Authorization: Bearer <token>"; unset: localhost only
+    PROMETHEUS_MULTIPROC_DIR: str | None = None  # required with more than one worker
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 20000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_SERIALIZE_WRITES: bool = False
     JWT_SECRET: str = "please-change-this-secret"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5  # admin routes trust the adm claim, so a demotion applies within this
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REFRESH_TOKEN_MAX_SESSIONS: int = 10  # 0 disables the cap
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600  # 0 disables the scheduled purge
+    REFRESH_TOKEN_PURGE_BATCH: int = 1000
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
     RATE_LIMIT_PER_MINUTE: int = 120
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | sqlite (shared by all workers on the host); app.serve uses sqlite with >1 worker
+    RATE_LIMIT_SQLITE_PATH: str = "./ratelimit.db"
+    RATE_LIMIT_EVICT_INTERVAL_SECONDS: float = 60.0
+    LOGIN_THROTTLE_ATTEMPTS: int = 5
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # 0 hashes on the threadpool instead of worker processes
 
     MARZBAN_API_URL: Optional[str] = None
     MARZBAN_TOKEN: Optional[str] = None
     SANAEI_API_URL: Optional[str] = None
     SANAEI_TOKEN: Optional[str] = None
+    PROVIDER_POOL_SIZE: int = 20
+    PROVIDER_CONNECT_TIMEOUT: float = 5.0
+    PROVIDER_READ_TIMEOUT: float = 15.0
+    PROVIDER_MAX_RETRIES: int = 2
+    PROVIDER_RETRY_BACKOFF: float = 0.5
+    PROVIDER_BREAKER_THRESHOLD: int = 3
+    PROVIDER_BREAKER_RESET_SECONDS: float = 30.0
+    PROVIDER_HEALTH_PATH: str = "/health"
+    PROVIDER_HEALTH_TIMEOUT: float = 3.0
+    PROVIDER_HEALTH_INTERVAL_SECONDS: float = 15.0  # 0 disables probes and node reloads
+
+    DEFAULT_PROVIDER: str = "marzban"
+    AUTO_PROVISION_ORDERS: bool = True
+    PROVISION_WORKERS: int = 4
+    PROVISION_JOB_MAX_ATTEMPTS: int = 5
+    PROVISION_JOB_BACKOFF_SECONDS: float = 10.0
+    PROVISION_JOB_MAX_BACKOFF_SECONDS: float = 600.0
+    PROVISION_JOB_POLL_SECONDS: float = 2.0
+    PROVISION_JOB_LOCK_TIMEOUT_SECONDS: int = 120
+
+    BULK_PROVISION_CONCURRENCY: int = 20
+    BULK_PROVISION_COMMIT_BATCH: int = 100
+    BULK_PROVISION_MAX_ITEMS: int = 5000
+
+    USAGE_SYNC_ENABLED: bool = True
+    USAGE_SYNC_INTERVAL_SECONDS: int = 300
+    USAGE_SYNC_BATCH_SIZE: int = 500
+    USAGE_SYNC_CONCURRENCY: int = 10
+    USAGE_CACHE_TTL_SECONDS: float = 30.0
+    USAGE_CACHE_STALE_SECONDS: float = 60.0
+    USAGE_CACHE_MAX_ENTRIES: int = 10000
+
+    ENFORCEMENT_INTERVAL_SECONDS: int = 60  # 0 disables the scheduler
+    ENFORCEMENT_BATCH_SIZE: int = 500
+    ENFORCEMENT_CONCURRENCY: int = 10
+    ENFORCEMENT_RETRY_SECONDS: int = 300
+
+    EXPORT_CHUNK_SIZE: int = 1000
+    CATALOG_MAX_AGE_SECONDS: int = 60
+    CATALOG_REFRESH_SECONDS: float = 5.0  # reload interval, picks up plan edits made by other workers
 
     PAYMENT_PROVIDER: str = "mock"
     ZARINPAL_MERCHANT_ID: Optional[str] = None
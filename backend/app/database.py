@@ -1,16 +1,136 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import asyncio
+import re
+import weakref
+from sqlalchemy import TextClause, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.util import await_only
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url(url: str) -> str:
+    """Map the plain DATABASE_URL forms onto their async drivers."""
+    for prefix, driver in (("sqlite://", "sqlite+aiosqlite://"),
+                           ("postgresql://", "postgresql+asyncpg://"),
+                           ("postgres://", "postgresql+asyncpg://")):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:")):
+        return {}
+    opts = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite"):
+        # aiosqlite defaults to NullPool, which opens a connection and thread per checkout
+        opts["poolclass"] = AsyncAdaptedQueuePool
+    return opts
+
+DATABASE_URL = async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+    ]
+
+if IS_SQLITE and settings.SQLITE_TUNING:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for pragma in sqlite_pragmas():
+            cur.execute(pragma)
+        cur.close()
+
+if settings.METRICS_ENABLED:
+    from .services.metrics import instrument_engine
+    instrument_engine(engine.sync_engine)
+
+_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_WRITE_SQL = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+def _write_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    return lock
+
+def _is_write(statement) -> bool:
+    if isinstance(statement, TextClause):
+        return bool(_WRITE_SQL.match(statement.text))
+    return bool(getattr(statement, "is_dml", False))
+
+class SerializedSyncSession(Session):
+    """Session that queues behind a process-wide lock before writing.
+
+    SQLite allows a single writer; letting every request race for the file
+    lock turns into busy-waits and ``database is locked``. The lock is taken
+    at the first flush with pending changes or write statement (ORM or
+    ``text()``), whichever AsyncSession method issued it, and held until the
+    transaction ends, so writers run one at a time in FIFO order while
+    readers are never blocked. Only usable through ``SerializedWriteSession``,
+    as acquiring awaits on the event loop.
+    """
+    holds_write_lock = False
+
+    def acquire_write(self):
+        if not self.holds_write_lock:
+            await_only(_write_lock().acquire())
+            self.holds_write_lock = True
+
+    def release_write(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            _write_lock().release()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.release_write()
+
+@event.listens_for(SerializedSyncSession, "do_orm_execute")
+def _lock_write_statements(state):
+    if _is_write(state.statement):
+        state.session.acquire_write()
+
+@event.listens_for(SerializedSyncSession, "before_flush")
+def _lock_flush(session, _flush_context, _instances):
+    session.acquire_write()
+
+@event.listens_for(SerializedSyncSession, "after_transaction_end")
+def _unlock(session, transaction):
+    if transaction.parent is None:
+        session.release_write()
+
+@event.listens_for(SerializedSyncSession, "after_rollback")
+def _unlock_after_rollback(session):
+    # A failed flush rolls the database back at once, but the transaction only
+    # ends when the caller rolls back or closes.
+    session.release_write()
+
+class SerializedWriteSession(AsyncSession):
+    sync_session_class = SerializedSyncSession
+
+_session_class = SerializedWriteSession if IS_SQLITE and settings.SQLITE_SERIALIZE_WRITES else AsyncSession
+SessionLocal = async_sessionmaker(engine, class_=_session_class, autoflush=False, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,14 +1,61 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .middlewares.security_headers import SecurityHeadersMiddleware
 from .middlewares.rate_limit import RateLimitMiddleware
+from .middlewares.metrics import MetricsMiddleware
 from .config import settings
-from .database import engine, Base
-from .routers import auth, catalog, orders, admin, subscriptions
+from .database import engine, SessionLocal
+from .migrate import ensure_current
+from .clients.registry import start_clients, close_clients, run_health_loop
+from .services.usage_sync import run_usage_sync_loop
+from .services.refresh_tokens import run_purge_loop
+from .services.enforcement import run_enforcement_loop
+from .services.jobs import start_job_workers
+from .services.leader import run_as_leader
+from .services.catalog import plan_catalog, seed_default_plans
+from .security import start_password_pool, shutdown_password_pool
+from .routers import auth, catalog, orders, admin, exports, nodes, subscriptions, metrics
+from .services.metrics import mark_process_dead
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not settings.WEB_PREINITIALIZED:
+        await ensure_current()
+    async with SessionLocal() as db:
+        if not settings.WEB_PREINITIALIZED:
+            await seed_default_plans(db)
+        await plan_catalog.load(db)
+    start_password_pool()
+    await start_clients()
+    tasks = start_job_workers() if settings.PROVISION_WORKERS > 0 else []
+    if settings.PROVIDER_HEALTH_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_health_loop()))
+    # Sweeps that must not run once per worker go through the leader lock.
+    singletons = []
+    if settings.USAGE_SYNC_ENABLED:
+        singletons.append(run_usage_sync_loop)
+    if settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        singletons.append(run_purge_loop)
+    if settings.ENFORCEMENT_INTERVAL_SECONDS > 0:
+        singletons.append(run_enforcement_loop)
+    if singletons:
+        tasks.append(asyncio.create_task(run_as_leader(*singletons)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        await close_clients()
+        shutdown_password_pool()
+        await engine.dispose()
+        mark_process_dead()
 
-app = FastAPI(title=settings.APP_NAME)
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RateLimitMiddleware, limit=settings.RATE_LIMIT_PER_MINUTE, window_seconds=60)
 
@@ -19,12 +66,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(catalog.router)
 app.include_router(orders.router)
 app.include_router(admin.router)
+app.include_router(exports.router)
+app.include_router(nodes.router)
 app.include_router(subscriptions.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 @app.get("/health")
 def health():
@@ -0,0 +1,52 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..services.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+
+UNMATCHED = "<unmatched>"
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the route that served ``scope``; keeps label cardinality bounded.
+
+    Read after the app has run, from what the router stored in the scope, so
+    requests are not routed twice.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:  # plain Starlette routes, such as /docs, only record their endpoint
+        for route in scope["app"].router.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+    return UNMATCHED
+
+class MetricsMiddleware:
+    """Pure ASGI per-route latency histogram, request counter and in-flight gauge."""
+    def __init__(self, app: ASGIApp, skip_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # The route is only known once the router has run, so in-flight is per method.
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_template(scope)
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - t0)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            in_flight.dec()
@@ -1,23 +1,28 @@
-import time
-from collections import defaultdict, deque
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from ..services.rate_limiter import RateLimiter
+from ..services.metrics import RATE_LIMIT_REJECTIONS
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, limit: int = 60, window_seconds: int = 60):
-        super().__init__(app)
-        self.limit = limit
-        self.window = window_seconds
-        self.hits = defaultdict(deque)  # ip -> timestamps
+TOO_MANY_BODY = b'{"detail":"Too Many Requests"}'
+TOO_MANY_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(TOO_MANY_BODY)).encode()),
+]
 
-    async def dispatch(self, request, call_next):
-        ip = request.client.host if request.client else "unknown"
-        now = time.time()
-        q = self.hits[ip]
-        # purge old
-        while q and now - q[0] > self.window:
-            q.popleft()
-        if len(q) >= self.limit:
-            return JSONResponse({"detail": "Too Many Requests"}, status_code=429)
-        q.append(now)
-        return await call_next(request)
+class RateLimitMiddleware:
+    """Pure ASGI per-IP limiter; rejected requests never reach the app."""
+    def __init__(self, app: ASGIApp, limit: int = 60, window_seconds: int = 60, backend=None):
+        self.app = app
+        self.limiter = RateLimiter("ip", limit, window_seconds, backend)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        if not await self.limiter.hit(ip):
+            RATE_LIMIT_REJECTIONS.inc()
+            await send({"type": "http.response.start", "status": 429, "headers": TOO_MANY_HEADERS})
+            await send({"type": "http.response.body", "body": TOO_MANY_BODY})
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,112 @@
+"""Versioned schema migrations.
+
+Migrations live in ``app/migrations`` as ``NNNN_name.py`` modules exposing a
+synchronous ``upgrade(conn)``; each one runs in its own transaction together
+with the ``schema_migrations`` row that records it. A migration declares the
+tables, columns and indexes it touches itself instead of importing
+``app.models``, so later model changes cannot alter what it does. Apply them
+at deploy time:
+
+    python -m app.migrate            # apply pending migrations
+    python -m app.migrate status     # list applied / pending
+"""
+import asyncio
+import importlib
+import pkgutil
+import sys
+from datetime import datetime
+from sqlalchemy import Column, Connection, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateColumn
+from . import migrations
+from .database import engine as default_engine
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover() -> list[tuple[int, str, object]]:
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        head, _, _ = info.name.partition("_")
+        if head.isdigit():
+            found.append((int(head), info.name, importlib.import_module(f"{migrations.__name__}.{info.name}")))
+    return sorted(found, key=lambda m: m[0])
+
+
+def _applied(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table("schema_migrations"):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+async def applied_versions(engine: AsyncEngine | None = None) -> set[int]:
+    async with (engine or default_engine).connect() as conn:
+        return await conn.run_sync(_applied)
+
+async def upgrade(engine: AsyncEngine | None = None) -> list[str]:
+    """Apply every pending migration in order; returns the names applied."""
+    engine = engine or default_engine
+    async with engine.begin() as conn:
+        await conn.run_sync(_meta.create_all)
+        done = await conn.run_sync(_applied)
+    names = []
+    for version, name, module in discover():
+        if version in done:
+            continue
+        async with engine.begin() as conn:
+            await conn.run_sync(module.upgrade)
+            await conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        names.append(name)
+    return names
+
+async def ensure_current(engine: AsyncEngine | None = None):
+    """Refuse to serve against a schema that is missing migrations."""
+    pending = [name for v, name, _ in discover() if v not in await applied_versions(engine)]
+    if pending:
+        raise RuntimeError(f"database schema is out of date, pending migrations: {', '.join(pending)}; "
+                           f"run `python -m app.migrate`")
+
+
+# Helpers for migration modules. Every step is idempotent so databases that
+# were created by the old import-time create_all converge on the same schema.
+
+def add_column(conn: Connection, column: Column):
+    table = column.table.name
+    if column.name in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+    conn.execute(text(ddl))
+
+def create_indexes(conn: Connection, table: Table, *names: str):
+    existing = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(conn)
+
+
+async def _cli(argv: list[str]):
+    try:
+        if argv[:1] == ["status"]:
+            done = await applied_versions()
+            for version, name, _ in discover():
+                print(f"{'applied' if version in done else 'pending':>8}  {name}")
+        elif argv[:1] in ([], ["upgrade"]):
+            names = await upgrade()
+            print("\n".join(f"applied {n}" for n in names) or "schema is up to date")
+        else:
+            sys.exit("usage: python -m app.migrate [upgrade|status]")
+    finally:
+        await default_engine.dispose()
+
+def main(argv: list[str] | None = None):
+    asyncio.run(_cli(sys.argv[1:] if argv is None else argv))
+
+if __name__ == "__main__":
+    main()
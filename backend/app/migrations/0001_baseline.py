@@ -0,0 +1,60 @@
+"""Tables as created by the former import-time ``create_all``; existing tables are left alone.
+
+The definitions are a frozen copy of the models at that point. Columns,
+indexes and tables added since belong to the later migrations, so this one
+must not follow ``app.models``.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+
+meta = MetaData()
+
+Table(
+    "users", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("is_admin", Boolean),
+    Column("created_at", DateTime),
+)
+Table(
+    "plans", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+    Column("price", Float, nullable=False),
+    Column("duration_days", Integer),
+    Column("quota_gb", Float),
+    Column("created_at", DateTime),
+)
+Table(
+    "orders", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("plan_id", Integer, ForeignKey("plans.id"), nullable=False),
+    Column("status", String),
+    Column("amount", Float, nullable=False),
+    Column("created_at", DateTime),
+)
+Table(
+    "subscriptions", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("plan_id", Integer, ForeignKey("plans.id"), nullable=False),
+    Column("provider", String),
+    Column("external_username", String),
+    Column("external_id", String),
+    Column("started_at", DateTime),
+    Column("expires_at", DateTime),
+    Column("quota_gb", Float),
+    Column("used_gb", Float),
+)
+Table(
+    "refresh_tokens", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("jti", String, unique=True, index=True, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("revoked", Boolean),
+)
+
+def upgrade(conn):
+    meta.create_all(conn)
@@ -0,0 +1,14 @@
+"""Columns added to existing tables since the baseline."""
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table
+from ..migrate import add_column
+
+meta = MetaData()
+
+subscriptions = Table(
+    "subscriptions", meta,
+    Column("id", Integer, primary_key=True),
+    Column("usage_synced_at", DateTime, nullable=True),
+)
+
+def upgrade(conn):
+    add_column(conn, subscriptions.c.usage_synced_at)
@@ -0,0 +1,33 @@
+"""Indexes for the per-user listings, token cleanup and expiry scans."""
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, MetaData, Table
+from ..migrate import create_indexes
+
+meta = MetaData()
+
+subscriptions = Table(
+    "subscriptions", meta,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("expires_at", DateTime),
+    Index("ix_subscriptions_user_id", "user_id"),
+    Index("ix_subscriptions_expires_at", "expires_at"),
+)
+orders = Table(
+    "orders", meta,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("created_at", DateTime),
+    Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+)
+refresh_tokens = Table(
+    "refresh_tokens", meta,
+    Column("id", Integer, primary_key=True),
+    Column("revoked", Boolean),
+    Column("expires_at", DateTime),
+    Index("ix_refresh_tokens_revoked_expires_at", "revoked", "expires_at"),
+)
+
+def upgrade(conn):
+    create_indexes(conn, subscriptions, "ix_subscriptions_user_id", "ix_subscriptions_expires_at")
+    create_indexes(conn, orders, "ix_orders_user_id_created_at")
+    create_indexes(conn, refresh_tokens, "ix_refresh_tokens_revoked_expires_at")
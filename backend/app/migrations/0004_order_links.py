@@ -0,0 +1,20 @@
+"""Persist the order -> subscription link and per-user idempotency keys."""
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table
+from ..migrate import add_column, create_indexes
+
+meta = MetaData()
+
+Table("subscriptions", meta, Column("id", Integer, primary_key=True))
+orders = Table(
+    "orders", meta,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("subscription_id", Integer, ForeignKey("subscriptions.id"), nullable=True),
+    Column("idempotency_key", String, nullable=True),
+    Index("uq_orders_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+)
+
+def upgrade(conn):
+    add_column(conn, orders.c.subscription_id)
+    add_column(conn, orders.c.idempotency_key)
+    create_indexes(conn, orders, "uq_orders_user_id_idempotency_key")
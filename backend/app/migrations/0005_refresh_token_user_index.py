@@ -0,0 +1,15 @@
+"""Index for the per-user session cap on refresh tokens."""
+from sqlalchemy import Column, Index, Integer, MetaData, Table
+from ..migrate import create_indexes
+
+meta = MetaData()
+
+refresh_tokens = Table(
+    "refresh_tokens", meta,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Index("ix_refresh_tokens_user_id", "user_id"),
+)
+
+def upgrade(conn):
+    create_indexes(conn, refresh_tokens, "ix_refresh_tokens_user_id")
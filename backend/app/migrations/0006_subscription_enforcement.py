@@ -0,0 +1,31 @@
+"""Subscription status and the enforcement schedule."""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table, case, update
+from ..migrate import add_column, create_indexes
+
+meta = MetaData()
+
+subscriptions = Table(
+    "subscriptions", meta,
+    Column("id", Integer, primary_key=True),
+    Column("expires_at", DateTime),
+    Column("quota_gb", Float),
+    Column("used_gb", Float),
+    Column("status", String, server_default="active", nullable=False),
+    Column("suspended_reason", String, nullable=True),
+    Column("suspended_at", DateTime, nullable=True),
+    Column("next_check_at", DateTime, nullable=True),
+    Index("ix_subscriptions_status_next_check_at", "status", "next_check_at"),
+)
+
+def upgrade(conn):
+    table = subscriptions
+    for name in ("status", "suspended_reason", "suspended_at", "next_check_at"):
+        add_column(conn, table.c[name])
+    c = table.c
+    conn.execute(
+        update(table)
+        .where(c.next_check_at.is_(None), c.status == "active")
+        .values(next_check_at=case((c.used_gb >= c.quota_gb, datetime.utcnow()), else_=c.expires_at))
+    )
+    create_indexes(conn, table, "ix_subscriptions_status_next_check_at")
@@ -0,0 +1,30 @@
+"""Provider node registry and the subscription -> node link."""
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table
+from ..migrate import add_column, create_indexes
+
+meta = MetaData()
+
+provider_nodes = Table(
+    "provider_nodes", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("provider", String, nullable=False),
+    Column("name", String, unique=True, nullable=False),
+    Column("api_url", String, nullable=False),
+    Column("token", String, nullable=True),
+    Column("capacity", Integer, nullable=False),
+    Column("weight", Float, nullable=False),
+    Column("enabled", Boolean, nullable=False),
+    Column("created_at", DateTime),
+)
+subscriptions = Table(
+    "subscriptions", meta,
+    Column("id", Integer, primary_key=True),
+    Column("status", String),
+    Column("node_id", Integer, ForeignKey("provider_nodes.id"), nullable=True),
+    Index("ix_subscriptions_node_id_status", "node_id", "status"),
+)
+
+def upgrade(conn):
+    provider_nodes.create(conn, checkfirst=True)
+    add_column(conn, subscriptions.c.node_id)
+    create_indexes(conn, subscriptions, "ix_subscriptions_node_id_status")
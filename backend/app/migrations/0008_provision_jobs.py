@@ -0,0 +1,23 @@
+"""Provisioning job queue; databases created before the baseline was frozen already have it."""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+
+meta = MetaData()
+
+Table("subscriptions", meta, Column("id", Integer, primary_key=True))
+provision_jobs = Table(
+    "provision_jobs", meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("subscription_id", Integer, ForeignKey("subscriptions.id"), nullable=False, index=True),
+    Column("provider", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_run_at", DateTime, nullable=False),
+    Column("locked_at", DateTime, nullable=True),
+    Column("last_error", String, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_provision_jobs_status_next_run_at", "status", "next_run_at"),
+)
+
+def upgrade(conn):
+    provision_jobs.create(conn, checkfirst=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from .database import Base
@@ -29,28 +29,84 @@ class Order(Base):
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
     status = Column(String, default="pending")
     amount = Column(Float, nullable=False)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=True)
+    idempotency_key = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    subscription = relationship("Subscription")
+
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("uq_orders_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
+
+class ProviderNode(Base):
+    __tablename__ = "provider_nodes"
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)  # marzban | sanaei
+    name = Column(String, unique=True, nullable=False)
+    api_url = Column(String, nullable=False)
+    token = Column(String, nullable=True)
+    capacity = Column(Integer, default=0, nullable=False)  # max active subscriptions, 0 = unlimited
+    weight = Column(Float, default=1.0, nullable=False)
+    enabled = Column(Boolean, default=True, nullable=False)  # disabled nodes take no new users
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+def _next_check_default(context):
+    return context.get_current_parameters().get("expires_at")
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
     provider = Column(String, default="marzban")
     external_username = Column(String, nullable=True)
     external_id = Column(String, nullable=True)
+    node_id = Column(Integer, ForeignKey("provider_nodes.id"), nullable=True)  # None: the single-URL panel from settings
     started_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, default=lambda: datetime.utcnow() + timedelta(days=30))
+    expires_at = Column(DateTime, default=lambda: datetime.utcnow() + timedelta(days=30), index=True)
     quota_gb = Column(Float, default=50.0)
     used_gb = Column(Float, default=0.0)
+    usage_synced_at = Column(DateTime, nullable=True)
+    status = Column(String, default="active", server_default="active", nullable=False)  # active | suspended
+    suspended_reason = Column(String, nullable=True)  # expired | over_quota
+    suspended_at = Column(DateTime, nullable=True)
+    # When enforcement should next look at this row: its expiry, or now once it is over quota.
+    next_check_at = Column(DateTime, default=_next_check_default, nullable=True)
 
     user = relationship("User", back_populates="subscriptions")
 
+    __table_args__ = (
+        Index("ix_subscriptions_status_next_check_at", "status", "next_check_at"),
+        Index("ix_subscriptions_node_id_status", "node_id", "status"),
+    )
+
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     jti = Column(String, unique=True, index=True, nullable=False)
     expires_at = Column(DateTime, nullable=False)
     revoked = Column(Boolean, default=False)
+
+    __table_args__ = (Index("ix_refresh_tokens_revoked_expires_at", "revoked", "expires_at"),)
+
+
+class ProvisionJob(Base):
+    __tablename__ = "provision_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False, index=True)
+    provider = Column(String, nullable=False)
+    status = Column(String, default="queued", nullable=False)  # queued | running | done | dead
+    attempts = Column(Integer, default=0, nullable=False)
+    next_run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    subscription = relationship("Subscription")
+
+    __table_args__ = (Index("ix_provision_jobs_status_next_run_at", "status", "next_run_at"),)
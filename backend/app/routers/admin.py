@@ -1,45 +1,148 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from .. import models
-from ..schemas import ProvisionRequest
-from ..clients.marzban import MarzbanClient
-from ..clients.sanaei import SanaeiClient
-from datetime import datetime, timedelta
-import secrets
+from ..schemas import ProvisionRequest, BulkProvisionRequest, SetAdminRequest
+from ..clients.registry import get_client, place, release
+from ..config import settings
+from ..services.provisioning import create_remote_user, apply_provision
+from ..services.jobs import ACTIVE_STATUSES, claim_provision, enqueue_provision, notify_workers, job_out, settle_job
+from ..services import enforcement, refresh_tokens
+import asyncio
+import time
 
 from . import auth as auth_router
 router = APIRouter(prefix="/admin", tags=["admin"])
 
-def admin_only(db=Depends(get_db), user_id: int = Depends(auth_router.get_current_user_id)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user or not user.is_admin:
+async def admin_only(claims: dict = Depends(auth_router.get_current_claims)):
+    """Trust the token's ``adm`` claim. Admin access tokens expire after
+    ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES and refresh re-reads ``users.is_admin``,
+    so a demotion made by any worker applies within that window."""
+    if not claims.get("adm"):
         raise HTTPException(403, "Admins only")
-    return user
+    return int(claims["sub"])
 
-@router.post("/provision")
-def provision(req: ProvisionRequest, db: Session = Depends(get_db), _admin = Depends(admin_only)):
-    sub = db.query(models.Subscription).filter(models.Subscription.id == req.subscription_id).first()
+@router.post("/users/{user_id}/admin")
+async def set_admin(user_id: int, req: SetAdminRequest, db: AsyncSession = Depends(get_db), _admin = Depends(admin_only)):
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    if bool(user.is_admin) != req.is_admin:
+        user.is_admin = req.is_admin
+        await db.commit()
+    return {"user_id": user_id, "is_admin": req.is_admin}
+
+@router.post("/provision", status_code=202)
+async def provision(req: ProvisionRequest, db: AsyncSession = Depends(get_db), _admin = Depends(admin_only)):
+    sub = await db.get(models.Subscription, req.subscription_id)
     if not sub:
         raise HTTPException(404, "Subscription not found")
-    plan = db.query(models.Plan).filter(models.Plan.id == sub.plan_id).first()
-    username = f"user{sub.user_id}_{sub.id}"
-    password = secrets.token_urlsafe(8)
+    if get_client(req.provider) is None:
+        raise HTTPException(400, f"Unknown provider: {req.provider}")
+    job = await enqueue_provision(db, sub.id, req.provider)
+    await db.commit()
+    notify_workers()
+    return {"message": "Queued", "subscription_id": sub.id, "job_id": job.id, "status": job.status}
 
-    if req.provider == "marzban":
-        client = MarzbanClient()
-        res = client.create_user(username, password, plan.quota_gb, plan.duration_days)
+@router.post("/provision/bulk")
+async def provision_bulk(req: BulkProvisionRequest, db: AsyncSession = Depends(get_db), _admin = Depends(admin_only)):
+    if get_client(req.provider) is None:
+        raise HTTPException(400, f"Unknown provider: {req.provider}")
+    if req.subscription_ids and len(req.subscription_ids) > settings.BULK_PROVISION_MAX_ITEMS:
+        raise HTTPException(422, f"At most {settings.BULK_PROVISION_MAX_ITEMS} subscription_ids per request")
+    q = (
+        select(models.Subscription, models.Plan)
+        .join(models.Plan, models.Plan.id == models.Subscription.plan_id)
+        .order_by(models.Subscription.id)
+    )
+    if req.subscription_ids:
+        q = q.where(models.Subscription.id.in_(req.subscription_ids))
     else:
-        client = SanaeiClient()
-        res = client.create_user(username, password, plan.quota_gb, plan.duration_days)
-
-    if "error" in res:
-        raise HTTPException(502, f"Provision failed: {res['error']}")
-
-    sub.provider = req.provider
-    sub.external_username = username
-    sub.external_id = str(res.get("id") or res.get("uuid") or "")
-    sub.started_at = datetime.utcnow()
-    sub.expires_at = datetime.utcnow() + timedelta(days=plan.duration_days)
-    db.commit(); db.refresh(sub)
-    return {"message": "Provisioned", "subscription_id": sub.id, "external": res}
+        q = q.join(models.Order, models.Order.subscription_id == models.Subscription.id).where(
+            models.Order.status == "paid",
+            models.Subscription.external_username.is_(None),
+            ~exists().where(models.ProvisionJob.subscription_id == models.Subscription.id,
+                            models.ProvisionJob.status.in_(ACTIVE_STATUSES)),
+        ).limit(min(req.limit or settings.BULK_PROVISION_MAX_ITEMS, settings.BULK_PROVISION_MAX_ITEMS))
+    rows = (await db.execute(q)).all()
+
+    results = []
+    if req.subscription_ids:
+        found = {sub.id for sub, _ in rows}
+        results.extend({"subscription_id": sid, "ok": False, "error": "Subscription not found"}
+                       for sid in req.subscription_ids if sid not in found)
+    todo = []
+    for sub, plan in rows:
+        if sub.external_username:
+            results.append({"subscription_id": sub.id, "ok": False, "error": "Already provisioned"})
+        else:
+            todo.append((sub, plan))
+    # Provision through the job queue so workers and other bulk runs skip these
+    # rows; failures stay queued and the workers retry them with backoff.
+    jobs = await claim_provision(db, [sub.id for sub, _ in todo], req.provider) if todo else {}
+    results.extend({"subscription_id": sub.id, "ok": False, "error": "Provisioning already in progress"}
+                   for sub, _ in todo if sub.id not in jobs)
+    todo = [(sub, plan) for sub, plan in todo if sub.id in jobs]
+
+    sem = asyncio.Semaphore(req.concurrency or settings.BULK_PROVISION_CONCURRENCY)
+
+    async def one(sub, plan):
+        async with sem:
+            try:
+                client, node_id = place(req.provider)
+            except LookupError as e:
+                return sub, plan, None, {"error": str(e)}, None
+            username, res = await create_remote_user(client, sub, plan)
+            if "error" in res:
+                release(node_id)
+            return sub, plan, username, res, node_id
+
+    started = time.perf_counter()
+    pending = 0
+    succeeded = 0
+    for fut in asyncio.as_completed([one(sub, plan) for sub, plan in todo]):
+        sub, plan, username, res, node_id = await fut
+        if "error" in res:
+            settle_job(jobs[sub.id], str(res["error"]))
+            results.append({"subscription_id": sub.id, "ok": False, "error": res["error"]})
+            continue
+        apply_provision(sub, plan, req.provider, username, res, node_id)
+        settle_job(jobs[sub.id], None)
+        results.append({"subscription_id": sub.id, "ok": True, "external_username": username})
+        succeeded += 1
+        pending += 1
+        if pending >= settings.BULK_PROVISION_COMMIT_BATCH:
+            await db.commit()
+            pending = 0
+    await db.commit()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed_seconds": round(elapsed, 3),
+        "per_second": round(len(todo) / elapsed, 1) if elapsed > 0 else None,
+        "results": sorted(results, key=lambda r: r["subscription_id"]),
+    }
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: int, db: AsyncSession = Depends(get_db), _admin = Depends(admin_only)):
+    job = await db.get(models.ProvisionJob, job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job_out(job)
+
+@router.get("/refresh-tokens/stats")
+async def refresh_token_stats(_admin = Depends(admin_only)):
+    return await refresh_tokens.table_stats()
+
+@router.post("/refresh-tokens/purge")
+async def purge_refresh_tokens(_admin = Depends(admin_only)):
+    purged = await refresh_tokens.purge_once()
+    return {"purged": purged, **refresh_tokens.purge_stats.as_dict()}
+
+@router.post("/enforcement/run")
+async def run_enforcement(_admin = Depends(admin_only)):
+    return await enforcement.enforce_once()
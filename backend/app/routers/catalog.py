@@ -1,20 +1,20 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
-from .. import models
+from fastapi import APIRouter, Request, Response
 from ..schemas import PlanOut
+from ..services.catalog import plan_catalog
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
 @router.get("/plans", response_model=list[PlanOut])
-def list_plans(db: Session = Depends(get_db)):
-    plans = db.query(models.Plan).all()
-    if not plans:
-        defaults = [
-            models.Plan(name="Basic 30d / 50GB", price=5.0, duration_days=30, quota_gb=50),
-            models.Plan(name="Pro 60d / 150GB", price=12.0, duration_days=60, quota_gb=150),
-            models.Plan(name="Max 90d / 300GB", price=20.0, duration_days=90, quota_gb=300),
-        ]
-        db.add_all(defaults); db.commit()
-        plans = db.query(models.Plan).all()
-    return plans
+async def list_plans(request: Request):
+    body, etag = await plan_catalog.snapshot()
+    headers = {"ETag": etag, "Cache-Control": plan_catalog.cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
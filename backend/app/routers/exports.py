@@ -0,0 +1,41 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from ..services import exports
+from ..services.exports import ExportFormat, SubscriptionStatus
+from .admin import admin_only
+
+router = APIRouter(prefix="/admin/exports", tags=["admin"], dependencies=[Depends(admin_only)])
+
+def _response(stmt, fmt: ExportFormat, name: str) -> StreamingResponse:
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(exports.stream_rows(stmt, fmt), media_type=exports.MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+# Keyset pagination: pass the last id you received as ``after_id`` to continue.
+
+@router.get("/subscriptions")
+async def export_subscriptions(format: ExportFormat = "ndjson", after_id: int = 0,
+                               limit: int | None = Query(None, ge=1), provider: str | None = None,
+                               expires_after: datetime | None = None, expires_before: datetime | None = None,
+                               status: SubscriptionStatus | None = None):
+    stmt = exports.subscriptions_query(after_id, limit, provider, expires_after, expires_before, status)
+    return _response(stmt, format, "subscriptions")
+
+@router.get("/orders")
+async def export_orders(format: ExportFormat = "ndjson", after_id: int = 0,
+                        limit: int | None = Query(None, ge=1), provider: str | None = None,
+                        expires_after: datetime | None = None, expires_before: datetime | None = None,
+                        status: str | None = None, created_after: datetime | None = None,
+                        created_before: datetime | None = None):
+    stmt = exports.orders_query(after_id, limit, provider, expires_after, expires_before, status,
+                                created_after, created_before)
+    return _response(stmt, format, "orders")
+
+@router.get("/usage")
+async def export_usage(format: ExportFormat = "ndjson", after_id: int = 0,
+                       limit: int | None = Query(None, ge=1), provider: str | None = None,
+                       expires_after: datetime | None = None, expires_before: datetime | None = None,
+                       status: SubscriptionStatus | None = None):
+    stmt = exports.usage_query(after_id, limit, provider, expires_after, expires_before, status)
+    return _response(stmt, format, "usage")
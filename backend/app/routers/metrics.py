@@ -0,0 +1,25 @@
+import hmac
+import ipaddress
+from fastapi import APIRouter, HTTPException, Request, Response
+from ..config import settings
+from ..services.metrics import render
+
+router = APIRouter(tags=["metrics"])
+
+def _is_loopback(host: str | None) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Token-protected when METRICS_TOKEN is set; otherwise only served to local scrapers."""
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(401, "Unauthorized")
+    elif not _is_loopback(request.client.host if request.client else None):
+        raise HTTPException(403, "Set METRICS_TOKEN to scrape metrics from another host")
+    body, content_type = render()
+    return Response(body, media_type=content_type)
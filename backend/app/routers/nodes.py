@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db
+from .. import models
+from ..schemas import ProviderNodeCreate, ProviderNodeUpdate
+from ..clients.registry import check_health
+from ..services import nodes
+from .admin import admin_only
+
+router = APIRouter(prefix="/admin/nodes", tags=["admin"], dependencies=[Depends(admin_only)])
+
+# Pool state (load, breaker, last probe) is this worker's view; other workers
+# pick up changes on their next health check.
+
+def _node_out(node_id: int) -> dict:
+    node = nodes.get(node_id)
+    if node is None:
+        raise HTTPException(404, "Node not found")
+    return node.as_dict()
+
+async def _commit(db: AsyncSession):
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(409, "A node with that name already exists")
+    await nodes.load_nodes()
+
+@router.get("")
+async def list_nodes():
+    await nodes.load_nodes()
+    return [n.as_dict() for n in nodes.all_nodes()]
+
+@router.post("", status_code=201)
+async def create_node(req: ProviderNodeCreate, db: AsyncSession = Depends(get_db)):
+    row = models.ProviderNode(**req.model_dump())
+    db.add(row)
+    await _commit(db)
+    return _node_out(row.id)
+
+@router.patch("/{node_id}")
+async def update_node(node_id: int, req: ProviderNodeUpdate, db: AsyncSession = Depends(get_db)):
+    row = await db.get(models.ProviderNode, node_id)
+    if not row:
+        raise HTTPException(404, "Node not found")
+    for field, value in req.model_dump(exclude_unset=True).items():
+        setattr(row, field, value)
+    await _commit(db)
+    return _node_out(node_id)
+
+@router.delete("/{node_id}")
+async def delete_node(node_id: int, db: AsyncSession = Depends(get_db)):
+    row = await db.get(models.ProviderNode, node_id)
+    if not row:
+        raise HTTPException(404, "Node not found")
+    in_use = await db.scalar(select(models.Subscription.id).where(models.Subscription.node_id == node_id).limit(1))
+    if in_use is not None:
+        raise HTTPException(409, "Node still has subscriptions; disable it instead")
+    await db.delete(row)
+    await _commit(db)
+    return {"deleted": node_id}
+
+@router.post("/check")
+async def check_nodes():
+    """Reload and probe now instead of waiting for the health loop."""
+    await check_health()
+    return [n.as_dict() for n in nodes.all_nodes()]
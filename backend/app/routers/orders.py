@@ -1,30 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from .. import models
 from ..schemas import CreateOrderRequest, OrderOut
 from ..config import settings
+from ..services.jobs import new_provision_job, notify_workers, job_out
+from ..services.catalog import plan_catalog
 from . import auth as auth_router
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def _order_by_key(db: AsyncSession, user_id: int, key: str) -> models.Order | None:
+    return await db.scalar(select(models.Order).where(models.Order.user_id == user_id, models.Order.idempotency_key == key))
+
+async def _replay(db: AsyncSession, order: models.Order, data: CreateOrderRequest) -> models.Order:
+    if order.plan_id != data.plan_id:
+        raise HTTPException(409, "Idempotency-Key was already used for a different order")
+    if order.subscription_id is not None:
+        order.provision_job_id = await db.scalar(  # type: ignore
+            select(models.ProvisionJob.id)
+            .where(models.ProvisionJob.subscription_id == order.subscription_id)
+            .order_by(models.ProvisionJob.id).limit(1)
+        )
+    return order
 
 @router.post("", response_model=OrderOut)
-def create_order(data: CreateOrderRequest, user_id: int = Depends(auth_router.get_current_user_id), db: Session = Depends(get_db)):
-    plan = db.query(models.Plan).filter(models.Plan.id == data.plan_id).first()
+async def create_order(data: CreateOrderRequest, idempotency_key: str | None = Header(None, max_length=128),
+                       user_id: int = Depends(auth_router.get_current_user_id), db: AsyncSession = Depends(get_db)):
+    """Create an order, its subscription and provisioning job in one transaction.
+
+    Retrying with the same ``Idempotency-Key`` returns the original order.
+    """
+    if idempotency_key:
+        existing = await _order_by_key(db, user_id, idempotency_key)
+        if existing:
+            return await _replay(db, existing, data)
+    plan = await plan_catalog.get(data.plan_id)
     if not plan:
         raise HTTPException(404, "Plan not found")
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if not user:
         raise HTTPException(401, "Unauthorized")
-    order = models.Order(user_id=user.id, plan_id=plan.id, amount=plan.price, status="pending")
-    db.add(order); db.commit(); db.refresh(order)
+    order = models.Order(user_id=user.id, plan_id=plan.id, amount=plan.price, status="pending",
+                         idempotency_key=idempotency_key)
+    db.add(order)
+    job = None
     if settings.PAYMENT_PROVIDER == "mock":
         order.status = "paid"
-        db.commit(); db.refresh(order)
-        sub = models.Subscription(user_id=user.id, plan_id=plan.id, quota_gb=plan.quota_gb)
-        db.add(sub); db.commit(); db.refresh(sub)
-        order.subscription_id = sub.id  # type: ignore
+        order.subscription = models.Subscription(user_id=user.id, plan_id=plan.id, quota_gb=plan.quota_gb)
+        if settings.AUTO_PROVISION_ORDERS:
+            job = new_provision_job(order.subscription, settings.DEFAULT_PROVIDER)
+            db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key won the unique index.
+        await db.rollback()
+        existing = await _order_by_key(db, user_id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return await _replay(db, existing, data)
+    if job is not None:
+        notify_workers()
+        order.provision_job_id = job.id  # type: ignore
     return order
+
+@router.get("/jobs/{job_id}")
+async def provision_job_status(job_id: int, user_id: int = Depends(auth_router.get_current_user_id), db: AsyncSession = Depends(get_db)):
+    job = await db.scalar(
+        select(models.ProvisionJob)
+        .join(models.Subscription, models.Subscription.id == models.ProvisionJob.subscription_id)
+        .where(models.ProvisionJob.id == job_id, models.Subscription.user_id == user_id)
+    )
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job_out(job)
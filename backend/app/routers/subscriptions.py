@@ -1,16 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from .. import models
 from . import auth as auth_router
-from ..clients.marzban import MarzbanClient
-from ..clients.sanaei import SanaeiClient
+from ..services.usage_cache import usage_cache
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
 @router.get("")
-def list_subscriptions(db: Session = Depends(get_db), user_id: int = Depends(auth_router.get_current_user_id)):
-    subs = db.query(models.Subscription).filter(models.Subscription.user_id == user_id).all()
+async def list_subscriptions(db: AsyncSession = Depends(get_db), user_id: int = Depends(auth_router.get_current_user_id)):
+    subs = (await db.scalars(select(models.Subscription).where(models.Subscription.user_id == user_id))).all()
     return [{
         "id": s.id,
         "plan_id": s.plan_id,
@@ -19,15 +19,30 @@ def list_subscriptions(db: Session = Depends(get_db), user_id: int = Depends(aut
         "expires_at": s.expires_at.isoformat() if s.expires_at else None,
         "quota_gb": s.quota_gb,
         "used_gb": s.used_gb,
+        "usage_synced_at": s.usage_synced_at.isoformat() if s.usage_synced_at else None,
     } for s in subs]
 
 @router.get("/{sub_id}/usage")
-def usage(sub_id: int, db: Session = Depends(get_db), user_id: int = Depends(auth_router.get_current_user_id)):
-    sub = db.query(models.Subscription).filter(models.Subscription.id == sub_id, models.Subscription.user_id == user_id).first()
+async def usage(sub_id: int, live: bool = False, db: AsyncSession = Depends(get_db), user_id: int = Depends(auth_router.get_current_user_id)):
+    sub = await db.scalar(select(models.Subscription).where(models.Subscription.id == sub_id, models.Subscription.user_id == user_id))
     if not sub:
         raise HTTPException(404, "Subscription not found")
-    if sub.provider == "marzban":
-        client = MarzbanClient(); res = client.get_usage(sub.external_username or "")
-    else:
-        client = SanaeiClient(); res = client.get_usage(sub.external_username or "")
-    return res
+    if live and sub.external_username:
+        await db.close()  # don't hold a pooled connection while waiting on the provider
+        res = await usage_cache.get(sub.provider, sub.external_username, sub.node_id)
+        if "error" in res:
+            raise HTTPException(502, f"Usage lookup failed: {res['error']}")
+        return {
+            "subscription_id": sub.id,
+            "provider": sub.provider,
+            "used_gb": res["used_gb"],
+            "quota_gb": sub.quota_gb,
+            "usage_synced_at": None,
+        }
+    return {
+        "subscription_id": sub.id,
+        "provider": sub.provider,
+        "used_gb": sub.used_gb,
+        "quota_gb": sub.quota_gb,
+        "usage_synced_at": sub.usage_synced_at.isoformat() if sub.usage_synced_at else None,
+    }
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from typing import Literal
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 class SignupRequest(BaseModel):
     email: EmailStr
@@ -37,9 +38,45 @@ class OrderOut(BaseModel):
     status: str
     amount: float
     subscription_id: int | None = None
+    provision_job_id: int | None = None
     class Config:
         from_attributes = True
 
 class ProvisionRequest(BaseModel):
     subscription_id: int
     provider: str = "marzban"
+
+class SetAdminRequest(BaseModel):
+    is_admin: bool
+
+class BulkProvisionRequest(BaseModel):
+    subscription_ids: list[int] | None = None
+    filter: Literal["paid_unprovisioned"] | None = None
+    provider: str = "marzban"
+    concurrency: int | None = None
+    limit: int | None = Field(None, ge=1)
+
+    @model_validator(mode="after")
+    def target(self):
+        if not self.subscription_ids and not self.filter:
+            raise ValueError("Provide subscription_ids or a filter")
+        if self.concurrency is not None and self.concurrency < 1:
+            raise ValueError("concurrency must be positive")
+        return self
+
+class ProviderNodeCreate(BaseModel):
+    provider: Literal["marzban", "sanaei"]
+    name: str = Field(min_length=1, max_length=64)
+    api_url: str = Field(pattern=r"^https?://")
+    token: str | None = None
+    capacity: int = Field(0, ge=0)
+    weight: float = Field(1.0, gt=0)
+    enabled: bool = True
+
+class ProviderNodeUpdate(BaseModel):
+    name: str | None = Field(None, min_length=1, max_length=64)
+    api_url: str | None = Field(None, pattern=r"^https?://")
+    token: str | None = None
+    capacity: int | None = Field(None, ge=0)
+    weight: float | None = Field(None, gt=0)
+    enabled: bool | None = None
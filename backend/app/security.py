@@ -1,9 +1,24 @@
 from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import jwt
 from passlib.context import CryptContext
 from .config import settings
+from .services.metrics import PASSWORD_HASH_LATENCY, timed
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes needs_update() flag hashes
+# created under a different BCRYPT_ROUNDS so login can upgrade them.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -11,6 +26,37 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+def password_needs_rehash(hashed: str) -> bool:
+    return pwd_context.needs_update(hashed)
+
+# bcrypt is pure CPU; running it in worker processes keeps it off the event
+# loop and out of the threadpool that serves every other request.
+_hash_pool: ProcessPoolExecutor | None = None
+
+def start_password_pool():
+    global _hash_pool
+    if _hash_pool is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        for _ in range(settings.PASSWORD_HASH_WORKERS):
+            _hash_pool.submit(int)  # spawn workers now rather than on the first login
+
+def shutdown_password_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=True, cancel_futures=True)
+        _hash_pool = None
+
+async def hash_password_async(password: str) -> str:
+    with timed(PASSWORD_HASH_LATENCY.labels("hash")):
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    with timed(PASSWORD_HASH_LATENCY.labels("verify")):
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, verify_password, password, hashed)
+
 def create_token(subject: dict, expires_minutes: int) -> str:
     now = datetime.now(timezone.utc)
     payload = {"exp": now + timedelta(minutes=expires_minutes), "iat": now, "nbf": now, **subject}
@@ -22,10 +68,47 @@ def decode_token(token: str) -> dict:
 
 import uuid
 
-def create_access_token(user_id: int) -> str:
-    return create_token({"sub": str(user_id), "scope": "access"}, settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+def create_access_token(user_id: int, is_admin: bool = False) -> str:
+    minutes = settings.ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES if is_admin else settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    return create_token({"sub": str(user_id), "scope": "access", "adm": bool(is_admin)}, minutes)
 
 def create_refresh_token(user_id: int, jti: str | None = None, minutes: int | None = None) -> str:
     jti = jti or uuid.uuid4().hex
     minutes = minutes or (settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60)
     return create_token({"sub": str(user_id), "scope": "refresh", "jti": jti}, minutes)
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads keyed by SHA-256 of the token.
+
+    Entries are dropped at the token's ``exp``, so a cached ``adm`` claim
+    lives no longer than the short-lived admin token that carries it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                if payload["exp"] > time.time():
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    payload = None
+        if payload is None:
+            payload = decode_token(token)
+            with self._lock:
+                self._entries[key] = payload
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def __len__(self):
+        return len(self._entries)
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
@@ -0,0 +1,99 @@
+"""Production entry point.
+
+Runs the one-time startup work (schema migrations, default plans, a clean
+metrics directory) once in the parent process, then starts uvicorn with one
+worker per available CPU; the workers skip the schema check and seeding. With more than one worker the rate limiter always
+uses the shared SQLite backend:
+
+    python -m app.serve --host 127.0.0.1 --port 8000 [--workers N]
+
+SIGTERM stops accepting connections and gives in-flight requests up to
+WEB_GRACEFUL_TIMEOUT_SECONDS to finish before workers exit.
+"""
+import argparse
+import asyncio
+import glob
+import os
+import tempfile
+import uvicorn
+from .config import settings
+
+
+def worker_count(requested: int = 0) -> int:
+    if requested > 0:
+        return requested
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, settings.WEB_MAX_WORKERS))
+
+def prepare_metrics_dir(workers: int, port: int):
+    """Point every worker at one empty multiprocess directory for Prometheus.
+
+    Must run before anything imports prometheus_client; workers inherit the
+    environment variable.
+    """
+    path = settings.PROMETHEUS_MULTIPROC_DIR
+    if not settings.METRICS_ENABLED or (workers == 1 and not path):
+        return
+    path = path or os.path.join(tempfile.gettempdir(), f"vpnpanel-metrics-{port}")
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+def prepare_rate_limits(workers: int):
+    """Per-process limiter counters would let each client through ``workers`` times
+    over, so several workers always share the SQLite backend."""
+    if workers > 1 and settings.RATE_LIMIT_BACKEND == "memory":
+        print(f"RATE_LIMIT_BACKEND=memory is per worker; using sqlite at {settings.RATE_LIMIT_SQLITE_PATH} "
+              f"so the {workers} workers share limits")
+        os.environ["RATE_LIMIT_BACKEND"] = "sqlite"
+        settings.RATE_LIMIT_BACKEND = "sqlite"
+
+async def initialize():
+    from .database import engine, SessionLocal
+    from .migrate import upgrade
+    from .services.catalog import seed_default_plans
+    try:
+        for name in await upgrade():
+            print(f"applied migration {name}")
+        async with SessionLocal() as db:
+            await seed_default_plans(db)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default=settings.WEB_HOST)
+    ap.add_argument("--port", type=int, default=settings.WEB_PORT)
+    ap.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="0 = one per CPU")
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--skip-init", action="store_true", help="don't migrate or seed before starting")
+    args = ap.parse_args(argv)
+
+    workers = worker_count(args.workers)
+    prepare_metrics_dir(workers, args.port)
+    prepare_rate_limits(workers)
+    if not args.skip_init:
+        asyncio.run(initialize())
+        os.environ["WEB_PREINITIALIZED"] = "true"  # workers skip the schema check and seeding
+    print(f"starting {workers} worker(s) on {args.host}:{args.port}")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.WEB_FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=settings.WEB_KEEPALIVE_SECONDS,
+        backlog=settings.WEB_BACKLOG,
+        limit_concurrency=settings.WEB_LIMIT_CONCURRENCY or None,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT_SECONDS,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import time
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from ..schemas import PlanOut
+from .. import models
+
+DEFAULT_PLANS = [
+    dict(name="Basic 30d / 50GB", price=5.0, duration_days=30, quota_gb=50),
+    dict(name="Pro 60d / 150GB", price=12.0, duration_days=60, quota_gb=150),
+    dict(name="Max 90d / 300GB", price=20.0, duration_days=90, quota_gb=300),
+]
+
+async def seed_default_plans(db: AsyncSession):
+    if await db.scalar(select(models.Plan.id).limit(1)) is None:
+        db.add_all([models.Plan(**p) for p in DEFAULT_PLANS])
+        try:
+            await db.commit()
+        except IntegrityError:  # another process seeded first
+            await db.rollback()
+
+
+class PlanCatalog:
+    """In-memory copy of the plans table with the JSON response pre-rendered.
+
+    ``version`` is bumped whenever a session commits a Plan change in this
+    process; the next read reloads. Changes committed by other workers are
+    picked up by reloading at most CATALOG_REFRESH_SECONDS after the last
+    load. The ETag is a hash of the body, so workers holding the same plans
+    agree on it.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._plans: dict[int, PlanOut] = {}
+        self.body = b"[]"
+        self.etag = ""
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession | None = None):
+        async with self._lock:
+            await self._load(db)
+
+    async def _load(self, db: AsyncSession | None):
+        version, loaded_at = self.version, time.monotonic()
+        stmt = select(models.Plan).order_by(models.Plan.id)
+        if db is None:
+            async with SessionLocal() as own:
+                rows = (await own.scalars(stmt)).all()
+        else:
+            rows = (await db.scalars(stmt)).all()
+        plans = [PlanOut.model_validate(p) for p in rows]
+        self._plans = {p.id: p for p in plans}
+        self.body = json.dumps([p.model_dump() for p in plans], separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self._loaded_version, self._loaded_at = version, loaded_at
+
+    def _fresh(self) -> bool:
+        return (self._loaded_version == self.version
+                and time.monotonic() - self._loaded_at < settings.CATALOG_REFRESH_SECONDS)
+
+    async def _ensure_fresh(self):
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():  # a concurrent caller may have reloaded already
+                    await self._load(None)
+
+    def invalidate(self):
+        self.version += 1
+
+    async def get(self, plan_id: int) -> PlanOut | None:
+        await self._ensure_fresh()
+        return self._plans.get(plan_id)
+
+    async def snapshot(self) -> tuple[bytes, str]:
+        await self._ensure_fresh()
+        return self.body, self.etag
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={settings.CATALOG_MAX_AGE_SECONDS}"
+
+plan_catalog = PlanCatalog()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_plan_writes(session, flush_context):
+    if any(isinstance(o, models.Plan) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info["plans_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog(session):
+    if session.info.pop("plans_changed", False):
+        plan_catalog.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_plan_writes(session):
+    session.info.pop("plans_changed", None)
@@ -0,0 +1,119 @@
+"""Suspend subscriptions that expired or ran out of quota.
+
+``Subscription.next_check_at`` is the next moment a row could need
+enforcing: its expiry, or "now" once usage sync sees it over quota. A pass
+walks the (status, next_check_at) index for active rows that are due, so its
+cost follows how many rows became due, not the size of the table.
+
+Every batch disables the panel accounts first and only then marks the rows
+suspended, guarded on ``status = 'active'``; a pass that dies half way leaves
+the rest due and the next pass picks them up. Disabling an already disabled
+account is harmless, so re-running is safe.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from ..config import settings
+from ..database import SessionLocal
+from ..clients.registry import get_client
+from .metrics import SUBSCRIPTIONS_SUSPENDED
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+Sub = models.Subscription
+
+async def _due_page(now: datetime, limit: int):
+    async with SessionLocal() as db:
+        stmt = (
+            select(Sub.id, Sub.provider, Sub.node_id, Sub.external_username, Sub.expires_at, Sub.used_gb, Sub.quota_gb)
+            .where(Sub.status == "active", Sub.next_check_at <= now)
+            .order_by(Sub.next_check_at, Sub.id)
+            .limit(limit)
+        )
+        return (await db.execute(stmt)).all()
+
+def _reason(row, now: datetime) -> str | None:
+    if row.expires_at is not None and row.expires_at <= now:
+        return "expired"
+    if row.quota_gb is not None and (row.used_gb or 0) >= row.quota_gb:
+        return "over_quota"
+    return None
+
+async def _apply(now: datetime, suspended: dict[str, list[int]], retry: list[int], rescheduled: list[int]):
+    active = Sub.status == "active"
+    async with SessionLocal() as db:
+        for reason, ids in suspended.items():
+            await db.execute(
+                update(Sub).where(Sub.id.in_(ids), active)
+                .values(status="suspended", suspended_reason=reason, suspended_at=now, next_check_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        if retry:
+            await db.execute(
+                update(Sub).where(Sub.id.in_(retry), active)
+                .values(next_check_at=now + timedelta(seconds=settings.ENFORCEMENT_RETRY_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+        if rescheduled:
+            # Not over quota (any more) and not expired: next look is at expiry.
+            await db.execute(
+                update(Sub).where(Sub.id.in_(rescheduled), active)
+                .values(next_check_at=Sub.expires_at)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+async def enforce_once(batch_size: int | None = None, concurrency: int | None = None) -> dict:
+    """Suspend everything that is due now; returns counts per outcome.
+
+    Failed provider calls are retried ENFORCEMENT_RETRY_SECONDS later.
+    """
+    batch_size = batch_size or settings.ENFORCEMENT_BATCH_SIZE
+    concurrency = concurrency or settings.ENFORCEMENT_CONCURRENCY
+    started, now = time.perf_counter(), datetime.utcnow()
+    totals = {"expired": 0, "over_quota": 0, "failed": 0, "rescheduled": 0}
+    while True:
+        page = await _due_page(now, batch_size)
+        if not page:
+            break
+        suspended: dict[str, list[int]] = defaultdict(list)
+        by_panel = defaultdict(list)
+        retry, rescheduled = [], []
+        for row in page:
+            reason = _reason(row, now)
+            if reason is None:
+                rescheduled.append(row.id)
+            elif row.external_username:
+                by_panel[row.provider, row.node_id].append((row.id, row.external_username, reason))
+            else:
+                suspended[reason].append(row.id)  # never provisioned, nothing to disable
+        for (provider, node_id), items in by_panel.items():
+            client = get_client(provider, node_id)
+            done = await client.disable_users([u for _, u, _ in items], concurrency) if client else set()
+            for sub_id, username, reason in items:
+                (suspended[reason] if username in done else retry).append(sub_id)
+        await _apply(now, suspended, retry, rescheduled)
+        for reason, ids in suspended.items():
+            totals[reason] += len(ids)
+            SUBSCRIPTIONS_SUSPENDED.labels(reason).inc(len(ids))
+        totals["failed"] += len(retry)
+        totals["rescheduled"] += len(rescheduled)
+        if len(page) < batch_size:
+            break
+        await asyncio.sleep(0)
+    totals["seconds"] = round(time.perf_counter() - started, 3)
+    return totals
+
+async def run_enforcement_loop():
+    while True:
+        try:
+            totals = await enforce_once()
+            if totals["expired"] or totals["over_quota"] or totals["failed"]:
+                logger.info("enforcement: %s", totals)
+        except Exception:
+            logger.exception("enforcement pass failed")
+        await asyncio.sleep(settings.ENFORCEMENT_INTERVAL_SECONDS)
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Literal
+from sqlalchemy import Select, func, select
+from ..config import settings
+from ..database import SessionLocal
+from .. import models
+
+ExportFormat = Literal["csv", "ndjson"]
+SubscriptionStatus = Literal["active", "suspended", "expired", "over_quota", "unprovisioned"]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+Sub = models.Subscription
+
+def _keyset(stmt: Select, id_column, after_id: int, limit: int | None) -> Select:
+    stmt = stmt.where(id_column > after_id).order_by(id_column)
+    return stmt.limit(limit) if limit else stmt
+
+def _subscription_filters(stmt: Select, provider: str | None, expires_after: datetime | None,
+                          expires_before: datetime | None, status: SubscriptionStatus | None) -> Select:
+    if provider:
+        stmt = stmt.where(Sub.provider == provider)
+    if expires_after:
+        stmt = stmt.where(Sub.expires_at >= expires_after)
+    if expires_before:
+        stmt = stmt.where(Sub.expires_at < expires_before)
+    now = datetime.utcnow()
+    if status in ("active", "suspended"):
+        stmt = stmt.where(Sub.status == status)
+    elif status == "expired":
+        stmt = stmt.where(Sub.expires_at <= now)
+    elif status == "over_quota":
+        stmt = stmt.where(Sub.used_gb >= Sub.quota_gb)
+    elif status == "unprovisioned":
+        stmt = stmt.where(Sub.external_username.is_(None))
+    return stmt
+
+def subscriptions_query(after_id: int = 0, limit: int | None = None, provider: str | None = None,
+                        expires_after: datetime | None = None, expires_before: datetime | None = None,
+                        status: SubscriptionStatus | None = None) -> Select:
+    stmt = select(Sub.id, Sub.user_id, Sub.plan_id, Sub.provider, Sub.node_id, Sub.external_username, Sub.status,
+                  Sub.suspended_reason, Sub.started_at, Sub.expires_at, Sub.suspended_at, Sub.quota_gb,
+                  Sub.used_gb, Sub.usage_synced_at)
+    stmt = _subscription_filters(stmt, provider, expires_after, expires_before, status)
+    return _keyset(stmt, Sub.id, after_id, limit)
+
+def usage_query(after_id: int = 0, limit: int | None = None, provider: str | None = None,
+                expires_after: datetime | None = None, expires_before: datetime | None = None,
+                status: SubscriptionStatus | None = None) -> Select:
+    stmt = select(
+        Sub.id.label("subscription_id"), Sub.user_id, Sub.provider, Sub.node_id, Sub.external_username,
+        Sub.used_gb, Sub.quota_gb, (Sub.used_gb * 100.0 / func.nullif(Sub.quota_gb, 0)).label("usage_pct"),
+        Sub.usage_synced_at,
+    ).where(Sub.external_username.is_not(None))
+    stmt = _subscription_filters(stmt, provider, expires_after, expires_before, status)
+    return _keyset(stmt, Sub.id, after_id, limit)
+
+def orders_query(after_id: int = 0, limit: int | None = None, provider: str | None = None,
+                 expires_after: datetime | None = None, expires_before: datetime | None = None,
+                 status: str | None = None, created_after: datetime | None = None,
+                 created_before: datetime | None = None) -> Select:
+    O = models.Order
+    stmt = select(O.id, O.user_id, O.plan_id, O.status, O.amount, O.subscription_id, O.created_at)
+    if status:
+        stmt = stmt.where(O.status == status)
+    if created_after:
+        stmt = stmt.where(O.created_at >= created_after)
+    if created_before:
+        stmt = stmt.where(O.created_at < created_before)
+    if provider or expires_after or expires_before:
+        stmt = stmt.join(Sub, Sub.id == O.subscription_id)
+        stmt = _subscription_filters(stmt, provider, expires_after, expires_before, None)
+    return _keyset(stmt, O.id, after_id, limit)
+
+
+def _value(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+def _csv_chunk(rows) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([("" if v is None else _value(v)) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+async def stream_rows(stmt: Select, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """Yield the serialized result of ``stmt`` one ``yield_per`` chunk at a time.
+
+    The session lives inside the generator, so it is opened when the
+    response starts streaming and released when it ends; rows come off a
+    server-side cursor and only one chunk is in memory at a time.
+    """
+    async with SessionLocal() as db:
+        result = await db.stream(stmt, execution_options={"yield_per": settings.EXPORT_CHUNK_SIZE})
+        keys = list(result.keys())
+        if fmt == "csv":
+            yield _csv_chunk([keys])
+        async for chunk in result.partitions():
+            if fmt == "csv":
+                yield _csv_chunk(chunk)
+            else:
+                yield "".join(json.dumps({k: _value(v) for k, v in zip(keys, row)}) + "\n" for row in chunk).encode()
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import SessionLocal
+from ..clients.registry import place, release
+from .provisioning import create_remote_user, apply_provision
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_wakeup: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+async def enqueue_provision(db: AsyncSession, subscription_id: int, provider: str) -> models.ProvisionJob:
+    """Add a provisioning job to ``db`` (the caller commits).
+
+    Re-enqueueing a subscription that already has a pending job returns
+    that job instead of creating a duplicate.
+    """
+    job = await db.scalar(select(models.ProvisionJob).where(
+        models.ProvisionJob.subscription_id == subscription_id,
+        models.ProvisionJob.status.in_(ACTIVE_STATUSES),
+    ))
+    if job is None:
+        job = models.ProvisionJob(subscription_id=subscription_id, provider=provider,
+                                  status="queued", attempts=0, next_run_at=datetime.utcnow())
+        db.add(job)
+        await db.flush()
+    return job
+
+def new_provision_job(subscription: models.Subscription, provider: str) -> models.ProvisionJob:
+    """Job for a subscription created in the same unit of work.
+
+    A subscription that is not flushed yet cannot have a pending job, so
+    unlike ``enqueue_provision`` this needs no lookup and no extra flush.
+    """
+    return models.ProvisionJob(subscription=subscription, provider=provider,
+                               status="queued", attempts=0, next_run_at=datetime.utcnow())
+
+async def claim_provision(db: AsyncSession, subscription_ids: list[int], provider: str) -> dict[int, models.ProvisionJob]:
+    """Enqueue (or reuse) a job per subscription and claim it for the caller.
+
+    For callers that provision inline, such as bulk provisioning: holding the
+    job as ``running`` keeps workers and concurrent callers off the same
+    subscription. Commits; returns the claimed jobs by subscription id and
+    leaves out subscriptions whose job is already running elsewhere.
+    """
+    Job = models.ProvisionJob
+    pending = {job.subscription_id: job for job in (await db.scalars(select(Job).where(
+        Job.subscription_id.in_(subscription_ids), Job.status.in_(ACTIVE_STATUSES),
+    ))).all()}
+    now = datetime.utcnow()
+    # New jobs are invisible to everyone else until the commit, so they are created already claimed.
+    claimed = {sid: Job(subscription_id=sid, provider=provider, status="running", attempts=1, locked_at=now,
+                        next_run_at=now, updated_at=now)
+               for sid in subscription_ids if sid not in pending}
+    db.add_all(claimed.values())
+    queued = [job.id for job in pending.values() if job.status == "queued"]
+    if queued:
+        won = set(await db.scalars(
+            update(Job).where(Job.id.in_(queued), Job.status == "queued")
+            .values(status="running", locked_at=now, attempts=Job.attempts + 1, updated_at=now)
+            .returning(Job.id)
+        ))
+        claimed.update((sid, job) for sid, job in pending.items() if job.id in won)
+    await db.commit()
+    return claimed
+
+def settle_job(job: models.ProvisionJob, error: str | None):
+    """Record the outcome of an attempt on a claimed job (the caller commits)."""
+    job.locked_at = None
+    job.last_error = error
+    if error is None:
+        job.status = "done"
+    elif job.attempts >= settings.PROVISION_JOB_MAX_ATTEMPTS:
+        job.status = "dead"
+    else:
+        job.status = "queued"
+        job.next_run_at = datetime.utcnow() + _backoff(job.attempts)
+
+def notify_workers():
+    """Wake idle workers; safe to call from the event loop or a threadpool."""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+def job_out(job: models.ProvisionJob) -> dict:
+    return {
+        "id": job.id,
+        "subscription_id": job.subscription_id,
+        "provider": job.provider,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": settings.PROVISION_JOB_MAX_ATTEMPTS,
+        "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+        "last_error": job.last_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+def _backoff(attempts: int) -> timedelta:
+    delay = settings.PROVISION_JOB_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.PROVISION_JOB_MAX_BACKOFF_SECONDS))
+
+def _claim(job_id: int, now: datetime):
+    return (
+        update(models.ProvisionJob)
+        .where(models.ProvisionJob.id == job_id, models.ProvisionJob.status == "queued")
+        .values(status="running", locked_at=now, attempts=models.ProvisionJob.attempts + 1, updated_at=now)
+    )
+
+async def _claim_next():
+    """Atomically move one due job from queued to running.
+
+    The conditional UPDATE is the lock: when several workers (or processes)
+    pick the same candidate only one of them sees rowcount == 1.
+    """
+    async with SessionLocal() as db:
+        now = datetime.utcnow()
+        candidates = (await db.scalars(
+            select(models.ProvisionJob.id)
+            .where(models.ProvisionJob.status == "queued", models.ProvisionJob.next_run_at <= now)
+            .order_by(models.ProvisionJob.next_run_at, models.ProvisionJob.id)
+            .limit(5)
+        )).all()
+        for job_id in candidates:
+            res = await db.execute(_claim(job_id, now))
+            await db.commit()
+            if res.rowcount != 1:
+                continue
+            job = await db.get(models.ProvisionJob, job_id)
+            sub = await db.get(models.Subscription, job.subscription_id)
+            plan = await db.get(models.Plan, sub.plan_id) if sub else None
+            db.expunge_all()
+            return job, sub, plan
+        return None
+
+async def _finish(job_id: int, provider: str, username: str | None, res: dict | None, error: str | None,
+                  node_id: int | None = None):
+    async with SessionLocal() as db:
+        job = await db.get(models.ProvisionJob, job_id)
+        if error is None and res is not None:
+            sub = await db.get(models.Subscription, job.subscription_id)
+            plan = await db.get(models.Plan, sub.plan_id)
+            apply_provision(sub, plan, provider, username, res, node_id)
+        settle_job(job, error)
+        await db.commit()
+
+async def recover_stale_jobs() -> int:
+    """Requeue jobs left running by a worker that died mid-flight.
+
+    The lost run counted as an attempt, so jobs that have used them all up
+    are marked dead instead.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.PROVISION_JOB_LOCK_TIMEOUT_SECONDS)
+    stale = (models.ProvisionJob.status == "running", models.ProvisionJob.locked_at < cutoff)
+    exhausted = models.ProvisionJob.attempts >= settings.PROVISION_JOB_MAX_ATTEMPTS
+    async with SessionLocal() as db:
+        dead = await db.execute(
+            update(models.ProvisionJob).where(*stale, exhausted)
+            .values(status="dead", locked_at=None, last_error="worker lost the job", updated_at=now)
+        )
+        requeued = await db.execute(
+            update(models.ProvisionJob).where(*stale, ~exhausted)
+            .values(status="queued", locked_at=None, next_run_at=now, updated_at=now)
+        )
+        await db.commit()
+        return dead.rowcount + requeued.rowcount
+
+async def process_one() -> bool:
+    """Claim and run a single job; returns False when nothing was due."""
+    claimed = await _claim_next()
+    if claimed is None:
+        return False
+    job, sub, plan = claimed
+    username = res = error = node_id = None
+    if sub is None or plan is None:
+        error = "Subscription or plan not found"
+    elif sub.external_username:
+        pass  # provisioned by an earlier attempt or by hand
+    else:
+        try:
+            client, node_id = place(job.provider)
+            username, res = await create_remote_user(client, sub, plan)
+            if "error" in res:
+                error = str(res["error"])
+        except LookupError as e:
+            error = str(e)
+        except Exception as e:
+            logger.exception("provision job %s crashed", job.id)
+            error = str(e) or e.__class__.__name__
+        if error is not None:
+            release(node_id)
+    await _finish(job.id, job.provider, username, res, error, node_id)
+    return True
+
+async def _worker():
+    while True:
+        try:
+            if await process_one():
+                continue
+        except Exception:
+            logger.exception("provision worker error")
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.PROVISION_JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+async def _reaper():
+    while True:
+        try:
+            if n := await recover_stale_jobs():
+                logger.warning("recovered %d stale provision jobs", n)
+        except Exception:
+            logger.exception("stale job recovery failed")
+        await asyncio.sleep(settings.PROVISION_JOB_LOCK_TIMEOUT_SECONDS)
+
+def start_job_workers(count: int | None = None) -> list[asyncio.Task]:
+    global _wakeup, _loop
+    _wakeup = asyncio.Event()
+    _loop = asyncio.get_running_loop()
+    count = settings.PROVISION_WORKERS if count is None else count
+    tasks = [asyncio.create_task(_worker()) for _ in range(count)]
+    tasks.append(asyncio.create_task(_reaper()))
+    return tasks
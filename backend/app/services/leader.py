@@ -0,0 +1,52 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_lock_fd: int | None = None
+
+def lock_path() -> str:
+    if settings.LEADER_LOCK_PATH:
+        return settings.LEADER_LOCK_PATH
+    digest = hashlib.sha256(settings.DATABASE_URL.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"vpnpanel-leader-{digest}.lock")
+
+def try_acquire() -> bool:
+    """Take the host-wide leader lock without blocking; held until the process exits."""
+    global _lock_fd
+    if _lock_fd is not None:
+        return True
+    fd = os.open(lock_path(), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    _lock_fd = fd
+    return True
+
+def release():
+    global _lock_fd
+    if _lock_fd is not None:
+        fcntl.flock(_lock_fd, fcntl.LOCK_UN)
+        os.close(_lock_fd)
+        _lock_fd = None
+
+async def run_as_leader(*factories):
+    """Run the singleton loops from ``factories`` in exactly one worker per host.
+
+    Workers that lose the election retry every LEADER_RETRY_SECONDS, so the
+    loops move to another worker when the leader exits.
+    """
+    while not try_acquire():
+        await asyncio.sleep(settings.LEADER_RETRY_SECONDS)
+    logger.info("worker %d is the leader, starting %d background loop(s)", os.getpid(), len(factories))
+    try:
+        await asyncio.gather(*(factory() for factory in factories))
+    finally:
+        release()
@@ -0,0 +1,103 @@
+"""Prometheus metrics shared by the middleware, DB events, provider clients and limiters.
+
+With several uvicorn workers each process writes its samples to
+PROMETHEUS_MULTIPROC_DIR and ``/metrics`` aggregates the files, so any worker
+can answer a scrape. The directory must be emptied before the server starts.
+"""
+import os
+import time
+from ..config import settings
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client picks its storage from the environment on import.
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+                         buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served", ["method"],
+                       multiprocess_mode="livesum")
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["operation"])
+DB_ERRORS = Counter("db_query_errors_total", "SQL statements that raised", ["operation"])
+DB_LATENCY = Histogram("db_query_duration_seconds", "SQL statement latency", ["operation"], buckets=LATENCY_BUCKETS)
+
+PROVIDER_REQUESTS = Counter("provider_requests_total", "Calls to provider panels (each retry counts)",
+                            ["provider", "operation", "status"])
+PROVIDER_ERRORS = Counter("provider_request_errors_total", "Provider calls that failed before a response",
+                          ["provider", "operation", "error"])
+PROVIDER_NODE_UP = Gauge("provider_node_up", "1 while the node's circuit breaker is closed", ["provider", "node"],
+                         multiprocess_mode="livemin")
+PROVIDER_LATENCY = Histogram("provider_request_duration_seconds", "Provider call latency",
+                             ["provider", "operation"], buckets=LATENCY_BUCKETS)
+
+PASSWORD_HASH_LATENCY = Histogram("password_hash_duration_seconds", "bcrypt hash/verify latency incl. queueing",
+                                  ["operation"], buckets=LATENCY_BUCKETS)
+
+RATE_LIMIT_REJECTIONS = Counter("rate_limit_rejections_total", "Requests rejected by the per-IP limiter")
+LOGIN_THROTTLE_HITS = Counter("login_throttle_hits_total", "Logins refused by the login throttle")
+SUBSCRIPTIONS_SUSPENDED = Counter("subscriptions_suspended_total", "Subscriptions suspended by enforcement", ["reason"])
+
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead():
+    """Drop this worker's live gauges (in-flight counts) from the shared directory."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class timed:
+    """``with timed(HISTOGRAM.labels(...)):`` without the per-call overhead of ``Histogram.time()``."""
+    __slots__ = ("metric", "t0")
+
+    def __init__(self, metric):
+        self.metric = metric
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metric.observe(time.perf_counter() - self.t0)
+
+
+def instrument_engine(sync_engine):
+    """Count and time every statement through cursor events on ``sync_engine``."""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        op = _operation(statement)
+        DB_QUERIES.labels(op).inc()
+        DB_LATENCY.labels(op).observe(time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(ctx):
+        starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_ERRORS.labels(_operation(ctx.statement or "")).inc()
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "ALTER", "WITH"}
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:8].split(None, 1)
+    op = head[0].upper() if head else ""
+    return op if op in _OPERATIONS else "OTHER"
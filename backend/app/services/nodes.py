@@ -0,0 +1,111 @@
+"""Provider node pool: one client and circuit breaker per row of ``provider_nodes``.
+
+Each worker keeps its own copy and reloads it, with the number of active
+subscriptions per node, on every health check. Placements made in between
+are counted locally, so concurrent provisioning spreads out instead of piling
+onto the node that was least loaded at the last reload.
+"""
+import asyncio
+from datetime import datetime
+from sqlalchemy import func, select
+from ..clients.base import ProviderClient
+from ..clients.breaker import CircuitBreaker
+from ..database import SessionLocal
+from .metrics import PROVIDER_NODE_UP
+from .. import models
+
+class Node:
+    def __init__(self, row: models.ProviderNode):
+        self.id = row.id
+        self.api_url, self.token = row.api_url, row.token
+        self.breaker = CircuitBreaker()
+        self.client = ProviderClient(row.api_url, row.token, breaker=self.breaker)
+        self.load = 0
+        self.last_probe_at: datetime | None = None
+        self.last_probe_ok: bool | None = None
+        self.update(row)
+
+    def update(self, row: models.ProviderNode):
+        self.provider, self.name = row.provider, row.name
+        self.capacity, self.weight, self.enabled = row.capacity, row.weight, row.enabled
+        self.client.name = row.provider
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.breaker.closed and (not self.capacity or self.load < self.capacity)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "provider": self.provider,
+            "name": self.name,
+            "api_url": self.api_url,
+            "capacity": self.capacity,
+            "weight": self.weight,
+            "enabled": self.enabled,
+            "load": self.load,
+            "breaker": self.breaker.state,
+            "last_probe_at": self.last_probe_at.isoformat() if self.last_probe_at else None,
+            "last_probe_ok": self.last_probe_ok,
+        }
+
+_nodes: dict[int, Node] = {}
+
+def get(node_id: int) -> Node | None:
+    return _nodes.get(node_id)
+
+def all_nodes() -> list[Node]:
+    return sorted(_nodes.values(), key=lambda n: n.id)
+
+def has_nodes(provider: str) -> bool:
+    return any(n.provider == provider and n.enabled for n in _nodes.values())
+
+def place(provider: str) -> Node | None:
+    """Pick the enabled, healthy, non-full node with the lowest load per unit of weight."""
+    candidates = [n for n in _nodes.values() if n.provider == provider and n.available]
+    if not candidates:
+        return None
+    node = min(candidates, key=lambda n: ((n.load + 1) / n.weight, n.id))
+    node.load += 1
+    return node
+
+def release(node_id: int):
+    """Undo a ``place`` whose user was never created."""
+    node = _nodes.get(node_id)
+    if node is not None and node.load > 0:
+        node.load -= 1
+
+async def load_nodes():
+    """Sync the pool with ``provider_nodes``; clients are rebuilt only when the URL or token changed."""
+    Sub = models.Subscription
+    async with SessionLocal() as db:
+        rows = (await db.scalars(select(models.ProviderNode))).all()
+        ids = [row.id for row in rows]
+        loads = dict((await db.execute(
+            select(Sub.node_id, func.count()).where(Sub.node_id.in_(ids), Sub.status == "active").group_by(Sub.node_id)
+        )).all()) if ids else {}
+    for row in rows:
+        node = _nodes.get(row.id)
+        if node is not None and (node.api_url, node.token) != (row.api_url, row.token):
+            await node.client.aclose()
+            node = None
+        if node is None:
+            node = _nodes[row.id] = Node(row)
+            await node.client.start()
+        node.update(row)
+        node.load = loads.get(row.id, 0)
+    for node_id in set(_nodes) - set(ids):
+        await _nodes.pop(node_id).client.aclose()
+
+async def probe_nodes():
+    async def one(node: Node):
+        node.last_probe_ok = await node.client.probe()
+        node.last_probe_at = datetime.utcnow()
+        PROVIDER_NODE_UP.labels(node.provider, node.name).set(1 if node.breaker.closed else 0)
+
+    await asyncio.gather(*(one(n) for n in list(_nodes.values())))
+
+async def close_nodes():
+    for node in _nodes.values():
+        await node.client.aclose()
+    _nodes.clear()
@@ -0,0 +1,23 @@
+import secrets
+from datetime import datetime, timedelta
+from ..clients.base import ProviderClient
+from .. import models
+
+async def create_remote_user(client: ProviderClient, sub: models.Subscription, plan: models.Plan) -> tuple[str, dict]:
+    """Create the panel account for ``sub``; returns (username, provider response)."""
+    username = f"user{sub.user_id}_{sub.id}"
+    password = secrets.token_urlsafe(8)
+    res = await client.create_user(username, password, plan.quota_gb, plan.duration_days)
+    return username, res
+
+def apply_provision(sub: models.Subscription, plan: models.Plan, provider: str, username: str, res: dict,
+                    node_id: int | None = None):
+    now = datetime.utcnow()
+    sub.provider = provider
+    sub.node_id = node_id
+    sub.external_username = username
+    sub.external_id = str(res.get("id") or res.get("uuid") or "")
+    sub.started_at = now
+    sub.expires_at = now + timedelta(days=plan.duration_days)
+    sub.status, sub.suspended_reason, sub.suspended_at = "active", None, None
+    sub.next_check_at = sub.expires_at
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sliding-window counter: each key keeps the counts of the current and the
+# previous fixed window, and the previous count is weighted by how much of it
+# still overlaps the rolling window. Two integers per key, whatever the rate.
+
+def _roll(state: tuple[int, int, int] | None, idx: int) -> tuple[int, int]:
+    """Return (prev, cur) counts for window ``idx`` given a stored (idx, prev, cur)."""
+    if state is None:
+        return 0, 0
+    s_idx, s_prev, s_cur = state
+    if s_idx == idx:
+        return s_prev, s_cur
+    if s_idx == idx - 1:
+        return s_cur, 0
+    return 0, 0
+
+def _decide(prev: int, cur: int, limit: int, window: float, idx: int, now: float) -> tuple[bool, int]:
+    weight = 1.0 - (now - idx * window) / window
+    if prev * weight + cur >= limit:
+        return False, cur
+    return True, cur + 1
+
+
+class MemoryBackend:
+    """Per-process storage; idle keys are swept every ``evict_interval`` seconds."""
+
+    def __init__(self, evict_interval: float = 60.0):
+        self.evict_interval = evict_interval
+        self._state: dict[str, tuple[int, int, int, float]] = {}
+        self._lock = threading.Lock()
+        self._last_evict = time.monotonic()
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> bool:
+        idx = int(now // window)
+        with self._lock:
+            entry = self._state.get(key)
+            prev, cur = _roll(entry[:3] if entry else None, idx)
+            allowed, cur = _decide(prev, cur, limit, window, idx, now)
+            self._state[key] = (idx, prev, cur, (idx + 2) * window)
+            if time.monotonic() - self._last_evict > self.evict_interval:
+                self._evict(now)
+        return allowed
+
+    async def hit_async(self, key: str, limit: int, window: float, now: float) -> bool:
+        return self.hit(key, limit, window, now)  # a dict update; cheaper than a thread hop
+
+    def _evict(self, now: float):
+        self._last_evict = time.monotonic()
+        for key in [k for k, v in self._state.items() if v[3] <= now]:
+            del self._state[key]
+
+    def __len__(self):
+        return len(self._state)
+
+
+class SQLiteBackend:
+    """Storage shared by every worker process on the host through one SQLite file.
+
+    Each hit is a short ``BEGIN IMMEDIATE`` read-modify-write, so counts stay
+    exact across processes. Hits run on a small dedicated thread pool so a
+    worker waiting for the write lock never stalls its event loop, and when
+    the store is unavailable requests are let through rather than failed.
+    """
+
+    def __init__(self, path: str, evict_interval: float = 60.0, threads: int = 4):
+        self.path = path
+        self.evict_interval = evict_interval
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ratelimit")
+        self._local = threading.local()
+        self._last_evict = time.monotonic()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, idx INTEGER NOT NULL, prev INTEGER NOT NULL, "
+                "cur INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> bool:
+        idx = int(now // window)
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            logger.warning("rate limit store unavailable, allowing request: %s", e)
+            return True
+        try:
+            row = conn.execute("SELECT idx, prev, cur FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            prev, cur = _roll(row, idx)
+            allowed, cur = _decide(prev, cur, limit, window, idx, now)
+            conn.execute(
+                "INSERT INTO rate_limits (key, idx, prev, cur, expires_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET idx = excluded.idx, prev = excluded.prev, "
+                "cur = excluded.cur, expires_at = excluded.expires_at",
+                (key, idx, prev, cur, (idx + 2) * window),
+            )
+            if time.monotonic() - self._last_evict > self.evict_interval:
+                self._last_evict = time.monotonic()
+                conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning("rate limit store unavailable, allowing request: %s", e)
+            return True
+        return allowed
+
+    async def hit_async(self, key: str, limit: int, window: float, now: float) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.hit, key, limit, window, now)
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    def __init__(self, name: str, limit: int, window_seconds: float, backend=None):
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+        self.backend = backend if backend is not None else get_backend()
+
+    async def hit(self, key: str) -> bool:
+        """Count one event for ``key``; returns False when it is over the limit."""
+        return await self.backend.hit_async(f"{self.name}:{key}", self.limit, self.window, time.time())
+
+
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "sqlite":
+            os.makedirs(os.path.dirname(os.path.abspath(settings.RATE_LIMIT_SQLITE_PATH)), exist_ok=True)
+            _backend = SQLiteBackend(settings.RATE_LIMIT_SQLITE_PATH, settings.RATE_LIMIT_EVICT_INTERVAL_SECONDS)
+        elif settings.RATE_LIMIT_BACKEND == "memory":
+            _backend = MemoryBackend(settings.RATE_LIMIT_EVICT_INTERVAL_SECONDS)
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+    return _backend
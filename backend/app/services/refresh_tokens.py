@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import SessionLocal
+from ..models import RefreshToken
+from ..security import create_refresh_token
+
+logger = logging.getLogger(__name__)
+
+async def issue(db: AsyncSession, user_id: int, enforce_cap: bool = True) -> str:
+    """Persist a new refresh token for ``user_id`` and return it (the caller commits).
+
+    With ``enforce_cap`` the user's oldest live sessions beyond
+    REFRESH_TOKEN_MAX_SESSIONS are dropped.
+    """
+    jti = uuid.uuid4().hex
+    minutes = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60
+    if enforce_cap and settings.REFRESH_TOKEN_MAX_SESSIONS > 0:
+        oldest = (
+            select(RefreshToken.id)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+            .order_by(RefreshToken.id.desc())
+            .offset(settings.REFRESH_TOKEN_MAX_SESSIONS - 1)
+        )
+        await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(oldest))
+                         .execution_options(synchronize_session=False))
+    db.add(RefreshToken(user_id=user_id, jti=jti, revoked=False,
+                        expires_at=datetime.utcnow() + timedelta(minutes=minutes)))
+    return create_refresh_token(user_id, jti=jti, minutes=minutes)
+
+async def rotate(db: AsyncSession, user_id: int, jti: str | None) -> bool:
+    """Revoke a live token in one conditional UPDATE; False if it was already used, revoked or expired.
+
+    Two concurrent refreshes with the same token cannot both win: only one
+    UPDATE matches the ``revoked = false`` row.
+    """
+    if not jti:
+        return False
+    res = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, RefreshToken.user_id == user_id,
+               RefreshToken.revoked == False, RefreshToken.expires_at > datetime.utcnow())
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount == 1
+
+async def revoke(db: AsyncSession, jti: str | None):
+    if jti:
+        await db.execute(update(RefreshToken).where(RefreshToken.jti == jti).values(revoked=True)
+                         .execution_options(synchronize_session=False))
+
+
+class PurgeStats:
+    def __init__(self):
+        self.purged_total = 0
+        self.runs = 0
+        self.last_run_at: datetime | None = None
+        self.last_purged = 0
+        self.last_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "purged_total": self.purged_total,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_purged": self.last_purged,
+            "last_seconds": round(self.last_seconds, 3),
+            "last_rows_per_second": round(self.last_purged / self.last_seconds, 1) if self.last_seconds else 0.0,
+        }
+
+purge_stats = PurgeStats()
+
+async def _purge_chunk(condition, batch_size: int) -> int:
+    ids = select(RefreshToken.id).where(condition).limit(batch_size)
+    async with SessionLocal() as db:
+        res = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids))
+                               .execution_options(synchronize_session=False))
+        await db.commit()
+        return res.rowcount
+
+async def purge_once(batch_size: int | None = None) -> int:
+    """Delete revoked and expired rows in chunks of ``batch_size``, each in its own short transaction."""
+    batch_size = batch_size or settings.REFRESH_TOKEN_PURGE_BATCH
+    started, now, purged = time.perf_counter(), datetime.utcnow(), 0
+    for condition in (RefreshToken.revoked == True,
+                      (RefreshToken.revoked == False) & (RefreshToken.expires_at <= now)):
+        while True:
+            n = await _purge_chunk(condition, batch_size)
+            purged += n
+            if n < batch_size:
+                break
+            await asyncio.sleep(0)  # let requests in between chunks
+    purge_stats.runs += 1
+    purge_stats.purged_total += purged
+    purge_stats.last_run_at = datetime.utcnow()
+    purge_stats.last_purged = purged
+    purge_stats.last_seconds = time.perf_counter() - started
+    return purged
+
+async def table_stats() -> dict:
+    async with SessionLocal() as db:
+        total, live = (await db.execute(select(
+            func.count(RefreshToken.id),
+            func.count(RefreshToken.id).filter(RefreshToken.revoked == False, RefreshToken.expires_at > datetime.utcnow()),
+        ))).one()
+    return {"rows": total, "live": live, **purge_stats.as_dict()}
+
+async def run_purge_loop():
+    while True:
+        try:
+            n = await purge_once()
+            logger.info("refresh-token purge removed %d rows in %.2fs", n, purge_stats.last_seconds)
+        except Exception:
+            logger.exception("refresh-token purge failed")
+        await asyncio.sleep(settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import OrderedDict
+from ..config import settings
+from ..clients.registry import get_client
+
+Key = tuple[str, int | None, str]
+
+class UsageCache:
+    """TTL + LRU cache for live provider usage keyed by (provider, node_id, username).
+
+    Concurrent misses for the same key share one outbound call. Entries older
+    than ``ttl`` but younger than ``ttl + stale_ttl`` are served immediately
+    while a single background refresh runs.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Key, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[Key, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+
+    async def get(self, provider: str, username: str, node_id: int | None = None) -> dict:
+        key = (provider, node_id, username)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh(key)
+                return entry[1]
+        self.misses += 1
+        if key in self._inflight:
+            self.coalesced += 1
+        return await asyncio.shield(self._refresh(key))
+
+    def _refresh(self, key: Key) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: Key) -> dict:
+        provider, node_id, username = key
+        client = get_client(provider, node_id)
+        if client is None:
+            return {"error": f"Unknown provider: {provider}"}
+        self.fetches += 1
+        res = await client.get_usage(username)
+        if "error" not in res:
+            self._entries[key] = (time.monotonic(), res)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return res
+
+    def invalidate(self, provider: str, username: str, node_id: int | None = None):
+        self._entries.pop((provider, node_id, username), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "fetches": self.fetches,
+        }
+
+usage_cache = UsageCache(
+    ttl=settings.USAGE_CACHE_TTL_SECONDS,
+    stale_ttl=settings.USAGE_CACHE_STALE_SECONDS,
+    max_entries=settings.USAGE_CACHE_MAX_ENTRIES,
+)
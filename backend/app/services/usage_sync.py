@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, update
+from ..config import settings
+from ..database import SessionLocal
+from ..clients.registry import get_client
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+async def _load_page(after_id: int, limit: int) -> list[tuple[int, str, int | None, str, float]]:
+    async with SessionLocal() as db:
+        stmt = (
+            select(models.Subscription.id, models.Subscription.provider, models.Subscription.node_id,
+                   models.Subscription.external_username, models.Subscription.quota_gb)
+            .where(models.Subscription.id > after_id, models.Subscription.external_username.is_not(None))
+            .order_by(models.Subscription.id)
+            .limit(limit)
+        )
+        return [tuple(r) for r in await db.execute(stmt)]
+
+async def _write_usage(rows: list[dict], over_quota: list[int], now: datetime):
+    if not rows:
+        return
+    async with SessionLocal() as db:
+        await db.execute(update(models.Subscription), rows)
+        if over_quota:
+            # Make these due for the enforcement scheduler right away.
+            await db.execute(
+                update(models.Subscription)
+                .where(models.Subscription.id.in_(over_quota), models.Subscription.status == "active")
+                .values(next_check_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+async def sync_usage_once(batch_size: int | None = None, concurrency: int | None = None) -> int:
+    """Run one sweep over all provisioned subscriptions; returns rows updated."""
+    batch_size = batch_size or settings.USAGE_SYNC_BATCH_SIZE
+    concurrency = concurrency or settings.USAGE_SYNC_CONCURRENCY
+    last_id, updated = 0, 0
+    while True:
+        page = await _load_page(last_id, batch_size)
+        if not page:
+            return updated
+        last_id = page[-1][0]
+        by_panel: dict[tuple[str, int | None], list[tuple[int, str, float]]] = defaultdict(list)
+        for sub_id, provider, node_id, username, quota_gb in page:
+            by_panel[provider, node_id].append((sub_id, username, quota_gb))
+
+        rows, over_quota = [], []
+        now = datetime.utcnow()
+        for (provider, node_id), items in by_panel.items():
+            client = get_client(provider, node_id)
+            if client is None:
+                continue
+            usages = await client.get_usages([u for _, u, _ in items], concurrency=concurrency)
+            for sub_id, username, quota_gb in items:
+                if username in usages:
+                    rows.append({"id": sub_id, "used_gb": usages[username], "usage_synced_at": now})
+                    if quota_gb is not None and usages[username] >= quota_gb:
+                        over_quota.append(sub_id)
+        await _write_usage(rows, over_quota, now)
+        updated += len(rows)
+
+async def run_usage_sync_loop():
+    while True:
+        try:
+            started = datetime.utcnow()
+            n = await sync_usage_once()
+            logger.info("usage sync updated %d subscriptions in %.1fs", n, (datetime.utcnow() - started).total_seconds())
+        except Exception:
+            logger.exception("usage sync failed")
+        await asyncio.sleep(settings.USAGE_SYNC_INTERVAL_SECONDS)
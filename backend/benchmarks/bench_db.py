@@ -0,0 +1,96 @@
+"""Concurrent-request capacity of the DB-backed endpoints.
+
+Ramps the number of concurrent clients against /subscriptions and
+/subscriptions/{id}/usage under uvicorn and reports throughput, p99 and
+errors per level. Pass ``--baseline-ref`` to run the same load against an
+older commit (e.g. the last sync-session revision) for comparison.
+
+    python -m benchmarks.bench_db --levels 10,50,200 --seconds 5 --baseline-ref <commit>
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import git_worktree, percentile, start_server, stop_server, BACKEND_DIR
+from .stub_panel import _free_port
+
+
+async def prepare(client: httpx.AsyncClient, subs: int) -> tuple[dict, list[int]]:
+    await client.get("/catalog/plans")
+    creds = {"email": "dbbench@example.com", "password": "bench-password"}
+    r = await client.post("/auth/signup", json=creds)
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    plan_id = (await client.get("/catalog/plans")).json()[0]["id"]
+    for _ in range(subs):
+        await client.post("/orders", json={"plan_id": plan_id}, headers=headers)
+    ids = [s["id"] for s in (await client.get("/subscriptions", headers=headers)).json()]
+    return headers, ids
+
+
+async def level(client: httpx.AsyncClient, headers: dict, ids: list[int], concurrency: int, seconds: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    stop = time.perf_counter() + seconds
+
+    async def worker(n: int):
+        nonlocal errors
+        i = n
+        while time.perf_counter() < stop:
+            path = "/subscriptions" if i % 2 else f"/subscriptions/{ids[i % len(ids)]}/usage"
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(path, headers=headers)
+                if r.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": round(len(latencies) / seconds, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "errors": errors,
+    }
+
+
+async def drive(base: str, levels: list[int], seconds: float, subs: int) -> list[dict]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base, timeout=30, limits=limits) as client:
+        headers, ids = await prepare(client, subs)
+        return [await level(client, headers, ids, c, seconds) for c in levels]
+
+
+def run(label: str, backend_dir: str, args) -> None:
+    port = _free_port("127.0.0.1")
+    proc = start_server(port, {"AUTO_PROVISION_ORDERS": "false"}, backend_dir=backend_dir)
+    try:
+        rows = asyncio.run(drive(f"http://127.0.0.1:{port}", args.levels, args.seconds, args.subscriptions))
+    finally:
+        stop_server(proc)
+    for row in rows:
+        print(f"{label:>8} c={row['concurrency']:<4} {row['rps']:>8} req/s  p99 {row['p99_ms']:>8} ms  errors {row['errors']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--levels", type=lambda v: [int(x) for x in v.split(",")], default=[10, 50, 200])
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--subscriptions", type=int, default=20)
+    ap.add_argument("--baseline-ref", help="git ref to compare against, e.g. the last sync-session commit")
+    args = ap.parse_args()
+    if args.baseline_ref:
+        with git_worktree(args.baseline_ref) as baseline_dir:
+            run("baseline", baseline_dir, args)
+    run("current", BACKEND_DIR, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Enforcement pass time as the subscriptions table grows.
+
+Grows one SQLite database to each size with rows that are not due, makes
+``--due`` of them due (half expired, half over quota, all provisioned on a stub
+panel) and times one ``enforce_once()`` pass followed by an idle pass. Both
+should stay flat across sizes: a pass only reads the due slice of the
+(status, next_check_at) index.
+
+    python -m benchmarks.bench_enforcement --sizes 10000,100000,300000 --due 1000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from .stub_panel import StubPanel
+
+
+def _grow(db_path: str, start: int, stop: int):
+    later = datetime.utcnow() + timedelta(days=30)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO subscriptions (user_id, plan_id, provider, external_username, expires_at, quota_gb,"
+            " used_gb, status, next_check_at) VALUES (1, 1, 'marzban', ?, ?, 50, 1, 'active', ?)",
+            ((f"idle_{i}", later, later) for i in range(start, stop)),
+        )
+
+def _make_due(db_path: str, usernames: list[str]):
+    past = datetime.utcnow() - timedelta(minutes=1)
+    later = past + timedelta(days=30)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO subscriptions (user_id, plan_id, provider, external_username, expires_at, quota_gb,"
+            " used_gb, status, next_check_at) VALUES (1, 1, 'marzban', ?, ?, 50, ?, 'active', ?)",
+            ((u, past if i % 2 else later, 10 if i % 2 else 60, past) for i, u in enumerate(usernames)),
+        )
+
+
+async def run(sizes: list[int], due: int):
+    from app.clients.registry import close_clients, get_client, start_clients
+    from app.database import engine
+    from app.migrate import upgrade
+    from app.services.enforcement import enforce_once
+
+    await upgrade()
+    db_path = engine.url.database
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO users (email, password_hash) VALUES ('bench@example.com', 'x')")
+        conn.execute("INSERT INTO plans (name, price) VALUES ('bench', 1)")
+    await start_clients()
+    client = get_client("marzban")
+    print(f"{'rows':>9} {'due':>6} {'suspended':>10} {'pass s':>8} {'idle pass ms':>13}")
+    rows = 0
+    try:
+        for size in sizes:
+            _grow(db_path, rows, size - due)
+            usernames = [f"due_{size}_{i}" for i in range(due)]
+            await asyncio.gather(*(client.create_user(u, "x", 50, 30) for u in usernames))
+            _make_due(db_path, usernames)
+            rows = size
+            t0 = time.perf_counter()
+            totals = await enforce_once()
+            busy = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            await enforce_once()
+            idle = time.perf_counter() - t0
+            print(f"{size:>9} {due:>6} {totals['expired'] + totals['over_quota']:>10} {busy:>8.2f} {idle * 1000:>13.1f}")
+    finally:
+        await close_clients()
+        await engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--due", type=int, default=1000)
+    ap.add_argument("--latency-ms", type=float, default=5.0, help="stub panel latency per call")
+    args = ap.parse_args()
+    with StubPanel(latency_ms=args.latency_ms) as panel:
+        # Settings are read on import, so configure before touching ``app``.
+        os.environ.update(DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/bench.db", MARZBAN_API_URL=panel.url)
+        asyncio.run(run([int(s) for s in args.sizes.split(",")], args.due))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Memory and throughput of the streaming admin exports as the table grows.
+
+For each size a fresh server gets that many subscriptions inserted straight
+into SQLite, then the full table is streamed from /admin/exports/subscriptions.
+Peak server RSS should stay roughly flat across sizes; only the time grows.
+With SQLITE_TUNING on, expect it to climb until SQLite's page cache
+(SQLITE_CACHE_SIZE_KB) and mmap window (SQLITE_MMAP_SIZE) are full, then
+level off; run with SQLITE_TUNING=false to see the exporter on its own.
+
+    python -m benchmarks.bench_exports --sizes 10000,100000,300000 --format csv
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from .harness import start_server, stop_server
+from .stub_panel import _free_port
+
+
+def _rss_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+def _seed(db_path: str, user_id: int, rows: int):
+    now = datetime.utcnow()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE users SET is_admin = 1 WHERE id = ?", (user_id,))
+        plan_id = conn.execute("SELECT id FROM plans LIMIT 1").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO subscriptions (user_id, plan_id, provider, external_username, started_at, expires_at,"
+            " quota_gb, used_gb) VALUES (?, ?, 'marzban', ?, ?, ?, 50, ?)",
+            ((user_id, plan_id, f"bench_{i}", now, now + timedelta(days=i % 60), i % 70) for i in range(rows)),
+        )
+
+def run_size(rows: int, fmt: str) -> dict:
+    db_path = f"{tempfile.mkdtemp()}/bench.db"
+    port = _free_port("127.0.0.1")
+    proc = start_server(port, {"DATABASE_URL": f"sqlite:///{db_path}"})
+    base = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base, timeout=600) as client:
+            creds = {"email": "export@bench.example.com", "password": "bench-password"}
+            client.post("/auth/signup", json=creds).raise_for_status()
+            _seed(db_path, 1, rows)
+            token = client.post("/auth/login", json=creds).json()["access_token"]
+            rss_before = _rss_kb(proc.pid, "VmRSS")
+            lines = size = 0
+            t0 = time.perf_counter()
+            with client.stream("GET", "/admin/exports/subscriptions", params={"format": fmt},
+                               headers={"Authorization": f"Bearer {token}"}) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    lines += 1
+                    size += len(line) + 1
+            elapsed = time.perf_counter() - t0
+            peak = _rss_kb(proc.pid, "VmHWM")
+    finally:
+        stop_server(proc)
+    return {"rows": rows, "lines": lines, "mb": size / 1e6, "seconds": elapsed,
+            "rows_per_s": rows / elapsed, "rss_before_mb": rss_before / 1024, "peak_rss_mb": peak / 1024}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--format", choices=("csv", "ndjson"), default="ndjson")
+    args = ap.parse_args()
+    print(f"{'rows':>9} {'MB out':>8} {'seconds':>8} {'rows/s':>9} {'RSS start':>10} {'RSS peak':>9}")
+    for rows in (int(s) for s in args.sizes.split(",")):
+        r = run_size(rows, args.format)
+        print(f"{r['rows']:>9} {r['mb']:>8.1f} {r['seconds']:>8.2f} {r['rows_per_s']:>9.0f} "
+              f"{r['rss_before_mb']:>9.1f}M {r['peak_rss_mb']:>8.1f}M")
+
+if __name__ == "__main__":
+    main()
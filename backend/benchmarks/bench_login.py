@@ -0,0 +1,73 @@
+"""Login storm: throughput and /health latency with bcrypt on threads vs processes.
+
+Starts the API under uvicorn twice — once with PASSWORD_HASH_WORKERS=0
+(bcrypt on the shared threadpool, the old behaviour) and once with a
+process pool — and fires concurrent logins while probing /health.
+
+    python -m benchmarks.bench_login --seconds 10 --concurrency 32 --hash-workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from .harness import percentile, start_server, stop_server
+from .stub_panel import _free_port
+
+
+async def storm(base: str, seconds: float, concurrency: int) -> tuple[int, list[float]]:
+    creds = {"email": "bench@example.com", "password": "bench-password"}
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        await client.get("/catalog/plans")
+        await client.post("/auth/signup", json=creds)
+        stop = time.perf_counter() + seconds
+        logins = 0
+        health: list[float] = []
+
+        async def login_loop():
+            nonlocal logins
+            while time.perf_counter() < stop:
+                r = await client.post("/auth/login", json=creds)
+                assert r.status_code == 200, r.text
+                logins += 1
+
+        async def health_loop():
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(health_loop(), *(login_loop() for _ in range(concurrency)))
+        return logins, health
+
+
+def run(label: str, env: dict, args) -> None:
+    port = _free_port("127.0.0.1")
+    proc = start_server(port, env)
+    try:
+        logins, health = asyncio.run(storm(f"http://127.0.0.1:{port}", args.seconds, args.concurrency))
+    finally:
+        stop_server(proc)
+    health.sort()
+    p99 = percentile(health, 99)
+    print(f"{label:>9}: {logins / args.seconds:>7.1f} logins/s   /health p50 {statistics.median(health) * 1000:>7.1f} ms"
+          f"  p99 {p99 * 1000:>7.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--hash-workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--rounds", type=int, default=12)
+    args = ap.parse_args()
+    run("threads", {"PASSWORD_HASH_WORKERS": "0", "BCRYPT_ROUNDS": str(args.rounds)}, args)
+    run("processes", {"PASSWORD_HASH_WORKERS": str(args.hash_workers), "BCRYPT_ROUNDS": str(args.rounds)}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Requests/sec through the middleware stack: BaseHTTPMiddleware vs pure ASGI.
+
+Both apps mount the same routers; only the security-header and rate-limit
+layers differ. Requests go in-process over ``httpx.ASGITransport`` so the
+numbers isolate middleware overhead from socket I/O.
+
+    python -m benchmarks.bench_middleware --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import defaultdict, deque
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("USAGE_SYNC_ENABLED", "false")
+os.environ.setdefault("PROVISION_WORKERS", "0")
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app.main import app as new_app, health
+from app.config import settings
+from app.migrate import upgrade
+from app.routers import auth, catalog, orders, admin, subscriptions
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers.setdefault("X-Content-Type-Options", "nosniff")
+        response.headers.setdefault("X-Frame-Options", "DENY")
+        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
+        response.headers.setdefault("Referrer-Policy", "no-referrer")
+        response.headers.setdefault("Permissions-Policy", "geolocation=(), microphone=()")
+        response.headers.setdefault("Content-Security-Policy", "default-src 'self' 'unsafe-inline' https://unpkg.com https://cdn.tailwindcss.com https://fonts.googleapis.com https://fonts.gstatic.com; img-src 'self' data:;")
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, limit: int = 60, window_seconds: int = 60):
+        super().__init__(app)
+        self.limit = limit
+        self.window = window_seconds
+        self.hits = defaultdict(deque)
+
+    async def dispatch(self, request, call_next):
+        ip = request.client.host if request.client else "unknown"
+        now = time.time()
+        q = self.hits[ip]
+        while q and now - q[0] > self.window:
+            q.popleft()
+        if len(q) >= self.limit:
+            return JSONResponse({"detail": "Too Many Requests"}, status_code=429)
+        q.append(now)
+        return await call_next(request)
+
+
+def build_legacy_app(limit: int) -> FastAPI:
+    legacy = FastAPI()
+    legacy.add_middleware(LegacySecurityHeadersMiddleware)
+    legacy.add_middleware(LegacyRateLimitMiddleware, limit=limit, window_seconds=60)
+    legacy.add_middleware(CORSMiddleware, allow_origins=settings.CORS_ORIGINS, allow_credentials=True,
+                          allow_methods=["*"], allow_headers=["*"])
+    for r in (auth.router, catalog.router, orders.router, admin.router, subscriptions.router):
+        legacy.include_router(r)
+    legacy.get("/health")(health)
+    return legacy
+
+
+async def measure(app, path: str, n: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        assert (await client.get(path)).status_code == 200
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with sem:
+                r = await client.get(path)
+                assert r.status_code == 200, r.status_code
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        return n / (time.perf_counter() - t0)
+
+
+def _lift_rate_limit(app, limit: int):
+    """Raise the limit on an already-built stack so the benchmark measures overhead, not 429s."""
+    app.middleware_stack = app.build_middleware_stack()
+    layer = app.middleware_stack
+    while layer is not None:
+        if hasattr(layer, "limiter"):
+            layer.limiter.limit = limit
+        layer = getattr(layer, "app", None)
+
+
+async def main_async(args):
+    big = args.requests * 10
+    legacy = build_legacy_app(big)
+    _lift_rate_limit(new_app, big)
+    await upgrade()
+    async with new_app.router.lifespan_context(new_app):
+        for path in ("/health", "/catalog/plans"):
+            old_rps = await measure(legacy, path, args.requests, args.concurrency)
+            new_rps = await measure(new_app, path, args.requests, args.concurrency)
+            print(f"{path:<16} old {old_rps:>8.0f} req/s   new {new_rps:>8.0f} req/s   x{new_rps / old_rps:.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Provider node pool against several local stub panels.
+
+Registers three stub panels as Marzban nodes (one with double weight, one
+capped), bulk-provisions a batch of subscriptions, then kills a node and
+provisions another batch: placement should skip the dead node once its
+circuit breaker opens instead of waiting on it. Finally the node comes back
+and a health check closes the breaker again.
+
+    python -m benchmarks.bench_nodes --batch 200
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+
+import httpx
+
+from .harness import start_server, stop_server
+from .stub_panel import StubPanel, _free_port
+
+NODES = [
+    {"name": "node-a", "weight": 1.0, "capacity": 0},
+    {"name": "node-b", "weight": 1.0, "capacity": 60},
+    {"name": "node-c", "weight": 2.0, "capacity": 0},
+]
+
+
+def _show(client: httpx.Client, title: str, path: str = "/admin/nodes"):
+    print(f"\n{title}")
+    method = client.post if path.endswith("/check") else client.get
+    for n in method(path).json():
+        print(f"  {n['name']:<8} weight={n['weight']:<4} capacity={n['capacity'] or '-':<4} "
+              f"load={n['load']:<5} breaker={n['breaker']}")
+
+def _bulk(client: httpx.Client, batch: int, plan_id: int) -> dict:
+    for _ in range(batch):
+        client.post("/orders", json={"plan_id": plan_id}).raise_for_status()
+    t0 = time.perf_counter()
+    res = client.post("/admin/provision/bulk", json={"filter": "paid_unprovisioned", "provider": "marzban"}).json()
+    errors = {}
+    for r in res["results"]:
+        if not r["ok"]:
+            errors[r["error"][:60]] = errors.get(r["error"][:60], 0) + 1
+    return {"seconds": time.perf_counter() - t0, "ok": res["succeeded"], "failed": res["failed"], "errors": errors}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    args = ap.parse_args()
+
+    panels = [StubPanel(latency_ms=args.latency_ms).start() for _ in NODES]
+    db_path = f"{tempfile.mkdtemp()}/bench.db"
+    port = _free_port("127.0.0.1")
+    proc = start_server(port, {
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "AUTO_PROVISION_ORDERS": "false",
+        "PROVIDER_HEALTH_INTERVAL_SECONDS": "0",  # the bench triggers checks itself
+        "PROVIDER_RETRY_BACKOFF": "0.2",
+    })
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            creds = {"email": "nodes@bench.example.com", "password": "bench-password"}
+            client.post("/auth/signup", json=creds).raise_for_status()
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE users SET is_admin = 1 WHERE email = ?", (creds["email"],))
+            token = client.post("/auth/login", json=creds).json()["access_token"]
+            client.headers["Authorization"] = f"Bearer {token}"
+            plan_id = client.get("/catalog/plans").json()[0]["id"]
+            for spec, panel in zip(NODES, panels):
+                client.post("/admin/nodes", json={"provider": "marzban", "api_url": panel.url, **spec}).raise_for_status()
+
+            print("all nodes up:", _bulk(client, args.batch, plan_id))
+            _show(client, "placement (node-c has double weight, node-b is capped):")
+
+            dead_port = panels[0].port
+            panels[0].stop()
+            print("\nnode-a down:", _bulk(client, args.batch, plan_id))
+            _show(client, "after provisioning with node-a down:", "/admin/nodes/check")
+
+            panels[0] = StubPanel(latency_ms=args.latency_ms, port=dead_port).start()
+            _show(client, "node-a back, after a health check:", "/admin/nodes/check")
+            print("\nall nodes up again:", _bulk(client, args.batch, plan_id))
+            _show(client, "final placement:")
+    finally:
+        stop_server(proc)
+        for panel in panels:
+            panel.stop()
+
+if __name__ == "__main__":
+    main()
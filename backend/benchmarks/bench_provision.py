@@ -0,0 +1,87 @@
+"""Provisioning throughput: per-call blocking client vs pooled async client.
+
+"before" mirrors the old clients: a fresh connection and a blocking POST per
+call, run on a 40-thread pool like Starlette's default. "after" drives one
+shared ``MarzbanClient`` from the event loop.
+
+    python -m benchmarks.bench_provision --requests 2000 --concurrency 40 --latency-ms 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.clients.marzban import MarzbanClient
+from .stub_panel import StubPanel
+
+
+def _payload(i: int) -> dict:
+    return {"username": f"bench{i}", "password": "x", "quota_gb": 50, "days": 30}
+
+
+def run_before(url: str, n: int, concurrency: int) -> list[float]:
+    def call(i):
+        t0 = time.perf_counter()
+        with httpx.Client(timeout=15) as c:
+            c.post(f"{url}/users", json=_payload(i)).json()
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, range(n)))
+
+
+async def run_after(url: str, n: int, concurrency: int) -> list[float]:
+    client = MarzbanClient(pool_size=concurrency)
+    client.base = url
+    await client.start()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def call(i):
+        async with sem:
+            t0 = time.perf_counter()
+            p = _payload(i)
+            res = await client.create_user(p["username"], p["password"], p["quota_gb"], p["days"])
+            assert "error" not in res, res
+            return time.perf_counter() - t0
+
+    try:
+        return await asyncio.gather(*(call(i) for i in range(n)))
+    finally:
+        await client.aclose()
+
+
+def report(label: str, latencies: list[float], elapsed: float) -> dict:
+    lat = sorted(latencies)
+    row = {
+        "mode": label,
+        "requests": len(lat),
+        "rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(statistics.median(lat) * 1000, 2),
+        "p99_ms": round(lat[int(len(lat) * 0.99) - 1] * 1000, 2),
+    }
+    print(f"{label:>7}: {row['rps']:>8} req/s  p50 {row['p50_ms']:>7} ms  p99 {row['p99_ms']:>7} ms")
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=40)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    with StubPanel(latency_ms=args.latency_ms) as panel:
+        t0 = time.perf_counter()
+        before = run_before(panel.url, args.requests, args.concurrency)
+        report("before", before, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        after = asyncio.run(run_after(panel.url, args.requests, args.concurrency))
+        report("after", after, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
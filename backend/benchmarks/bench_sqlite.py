@@ -0,0 +1,105 @@
+"""Mixed read/write load against SQLite: untuned vs tuned vs tuned + serialized writes.
+
+Each profile gets a fresh database and its own uvicorn (``--workers`` > 1
+puts several processes on the same file, which is where rollback-journal
+mode falls over). Clients interleave order creation with subscription
+reads; the script reports throughput, p50/p99 and error counts
+(``database is locked`` surfaces as 500s).
+
+    python -m benchmarks.bench_sqlite --seconds 10 --concurrency 50 --write-ratio 0.3 --workers 2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from .harness import percentile, start_server, stop_server
+from .stub_panel import _free_port
+
+PROFILES = {
+    "untuned": {"SQLITE_TUNING": "false", "SQLITE_SERIALIZE_WRITES": "false"},
+    "tuned": {"SQLITE_TUNING": "true", "SQLITE_SERIALIZE_WRITES": "false"},
+    "serialized": {"SQLITE_TUNING": "true", "SQLITE_SERIALIZE_WRITES": "true"},
+}
+
+
+async def prepare(client: httpx.AsyncClient, users: int) -> tuple[list[dict], int]:
+    plan_id = (await client.get("/catalog/plans")).json()[0]["id"]
+    headers = []
+    for n in range(users):
+        r = await client.post("/auth/signup", json={"email": f"sqlite{n}@example.com", "password": "bench-password"})
+        headers.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+    return headers, plan_id
+
+
+async def drive(base: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=30, limits=limits) as client:
+        headers, plan_id = await prepare(client, args.users)
+        reads: list[float] = []
+        writes: list[float] = []
+        errors = 0
+        stop = time.perf_counter() + args.seconds
+
+        async def worker(n: int):
+            nonlocal errors
+            rng = random.Random(n)
+            while time.perf_counter() < stop:
+                h = headers[rng.randrange(len(headers))]
+                is_write = rng.random() < args.write_ratio
+                t0 = time.perf_counter()
+                try:
+                    if is_write:
+                        r = await client.post("/orders", json={"plan_id": plan_id}, headers=h)
+                    else:
+                        r = await client.get("/subscriptions", headers=h)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if r.status_code != 200:
+                    errors += 1
+                    continue
+                (writes if is_write else reads).append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    reads.sort()
+    writes.sort()
+    return {
+        "rps": round((len(reads) + len(writes)) / args.seconds, 1),
+        "read_p50_ms": round(percentile(reads, 50) * 1000, 1),
+        "read_p99_ms": round(percentile(reads, 99) * 1000, 1),
+        "write_p50_ms": round(percentile(writes, 50) * 1000, 1),
+        "write_p99_ms": round(percentile(writes, 99) * 1000, 1),
+        "errors": errors,
+    }
+
+
+def run(label: str, env: dict, args) -> None:
+    port = _free_port("127.0.0.1")
+    extra = ["--workers", str(args.workers)] if args.workers > 1 else None
+    proc = start_server(port, {"AUTO_PROVISION_ORDERS": "false", **env}, extra_args=extra)
+    try:
+        row = asyncio.run(drive(f"http://127.0.0.1:{port}", args))
+    finally:
+        stop_server(proc)
+    print(f"{label:>10}: {row['rps']:>7} req/s  read p50/p99 {row['read_p50_ms']:>6}/{row['read_p99_ms']:<7} ms"
+          f"  write p50/p99 {row['write_p50_ms']:>6}/{row['write_p99_ms']:<7} ms  errors {row['errors']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--write-ratio", type=float, default=0.3)
+    ap.add_argument("--users", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--profiles", default=",".join(PROFILES))
+    args = ap.parse_args()
+    for name in args.profiles.split(","):
+        run(name, PROFILES[name], args)
+
+
+if __name__ == "__main__":
+    main()
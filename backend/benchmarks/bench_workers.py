@@ -0,0 +1,81 @@
+"""Throughput scaling of the production launcher with the worker count.
+
+Starts ``python -m app.serve --workers N`` for each N and drives it from
+several client processes (so the load generator is not the bottleneck),
+mixing cached catalog reads with authenticated DB reads. Scaling is
+reported relative to the first level; expect it to track the number of
+free cores.
+
+    python -m benchmarks.bench_workers --levels 1,2,4 --seconds 10 --clients 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+import httpx
+
+from .harness import start_server, stop_server
+from .stub_panel import _free_port
+
+
+async def _load(base: str, headers: dict, seconds: float, concurrency: int) -> tuple[int, int]:
+    done = errors = 0
+    stop = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=30, limits=limits) as client:
+        async def worker(n: int):
+            nonlocal done, errors
+            i = n
+            while time.perf_counter() < stop:
+                path = "/catalog/plans" if i % 2 else "/subscriptions"
+                i += 1
+                try:
+                    r = await client.get(path, headers=headers)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if r.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return done, errors
+
+
+def _client_proc(args: tuple) -> tuple[int, int]:
+    return asyncio.run(_load(*args))
+
+
+def run_level(workers: int, args) -> dict:
+    port = _free_port("127.0.0.1")
+    proc = start_server(port, command=["-m", "app.serve"], extra_args=["--workers", str(workers)])
+    base = f"http://127.0.0.1:{port}"
+    try:
+        r = httpx.post(f"{base}/auth/signup", json={"email": "workers@example.com", "password": "bench-password"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            results = pool.map(_client_proc, [(base, headers, args.seconds, args.concurrency)] * args.clients)
+    finally:
+        stop_server(proc)
+    done = sum(d for d, _ in results)
+    return {"workers": workers, "rps": round(done / args.seconds, 1), "errors": sum(e for _, e in results)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--levels", type=lambda v: [int(x) for x in v.split(",")], default=[1, 2, 4])
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--clients", type=int, default=4, help="load-generator processes")
+    ap.add_argument("--concurrency", type=int, default=32, help="connections per client process")
+    args = ap.parse_args()
+    first = None
+    for n in args.levels:
+        row = run_level(n, args)
+        first = first or row["rps"]
+        print(f"workers={n:<3} {row['rps']:>9} req/s  x{row['rps'] / first:.2f}  errors {row['errors']}")
+
+
+if __name__ == "__main__":
+    main()
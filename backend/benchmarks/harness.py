@@ -0,0 +1,84 @@
+"""Shared helpers for the benchmark scripts: server processes, worktrees, stats."""
+import contextlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+QUIET_ENV = {
+    "USAGE_SYNC_ENABLED": "false",
+    "PROVISION_WORKERS": "0",
+    "RATE_LIMIT_PER_MINUTE": "100000000",
+    "LOGIN_THROTTLE_ATTEMPTS": "100000000",
+    "BCRYPT_ROUNDS": "4",
+    "REFRESH_TOKEN_PURGE_INTERVAL_SECONDS": "0",
+    "ENFORCEMENT_INTERVAL_SECONDS": "0",
+}
+
+
+def start_server(port: int, env_overrides: dict | None = None, backend_dir: str = BACKEND_DIR,
+                 extra_args: list[str] | None = None, command: list[str] | None = None) -> subprocess.Popen:
+    """Migrate a fresh database, start the server from ``backend_dir`` and wait for /health.
+
+    ``command`` replaces the default ``-m uvicorn app.main:app``, e.g. ``["-m", "app.serve"]``.
+    """
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/bench.db",
+        **QUIET_ENV,
+        **(env_overrides or {}),
+    }
+    if os.path.exists(os.path.join(backend_dir, "app", "migrate.py")):
+        subprocess.run([sys.executable, "-m", "app.migrate"], cwd=backend_dir, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+    proc = subprocess.Popen(
+        [sys.executable, *(command or ["-m", "uvicorn", "app.main:app"]), "--port", str(port),
+         "--log-level", "warning", *(extra_args or [])],
+        cwd=backend_dir, env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+@contextlib.contextmanager
+def git_worktree(ref: str):
+    """Check ``ref`` out into a temporary worktree and yield its backend dir."""
+    path = tempfile.mkdtemp(prefix="vpnpanel-bench-")
+    shutil.rmtree(path)
+    subprocess.run(["git", "worktree", "add", "--detach", path, ref], cwd=REPO_DIR, check=True,
+                   stdout=subprocess.DEVNULL)
+    try:
+        yield os.path.join(path, "backend")
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", path], cwd=REPO_DIR, check=False)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
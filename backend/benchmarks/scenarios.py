@@ -0,0 +1,207 @@
+"""Load scenarios for the benchmark suite.
+
+Each scenario is ``async def scenario(ctx)``: it does its own setup and then
+keeps ``ctx.concurrency`` workers busy for ``ctx.seconds`` through
+``ctx.run_for``, timing every request through ``ctx.request`` under a route
+label such as ``"POST /orders"``.
+"""
+import asyncio
+import itertools
+import sqlite3
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from .harness import percentile
+
+PASSWORD = "bench-password"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.items: dict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+
+    def summary(self) -> dict:
+        elapsed = self.elapsed or float("nan")
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[route])
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        items = {name: round(n / elapsed, 1) for name, n in self.items.items()}
+        return {"seconds": round(self.elapsed, 2), "routes": routes, "items_per_s": items}
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, db_path: str, seconds: float, concurrency: int):
+        self.client = client
+        self.db_path = db_path
+        self.seconds = seconds
+        self.concurrency = concurrency
+        self.recorder = Recorder()
+        self._ids = itertools.count()
+
+    def unique_email(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}-{uuid.uuid4().hex[:6]}@example.com"
+
+    async def request(self, route: str, method: str, url: str, *, ok: tuple[int, ...] = (200,), **kwargs) -> httpx.Response | None:
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.errors[route] += 1
+            return None
+        if r.status_code not in ok:
+            self.recorder.errors[route] += 1
+            return None
+        self.recorder.latencies[route].append(time.perf_counter() - t0)
+        return r
+
+    async def run_for(self, step):
+        """Call ``await step(worker, iteration)`` from every worker until time is up."""
+        stop = time.perf_counter() + self.seconds
+
+        async def worker(n: int):
+            for i in itertools.count():
+                if time.perf_counter() >= stop:
+                    return
+                await step(n, i)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(self.concurrency)))
+        self.recorder.elapsed = time.perf_counter() - t0
+
+    async def signup(self, prefix: str) -> tuple[str, dict]:
+        email = self.unique_email(prefix)
+        r = await self.client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+        r.raise_for_status()
+        return email, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def admin(self) -> dict:
+        """Sign up a user, flag it admin directly in the database and log in again for an ``adm`` claim."""
+        email, _ = await self.signup("admin")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE users SET is_admin = 1 WHERE email = ?", (email,))
+        r = await self.client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        r.raise_for_status()
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def plan_id(self) -> int:
+        return (await self.client.get("/catalog/plans")).json()[0]["id"]
+
+    async def place_orders(self, headers: dict, plan_id: int, n: int) -> list[int]:
+        subs = []
+        for _ in range(n):
+            r = await self.client.post("/orders", json={"plan_id": plan_id}, headers=headers)
+            r.raise_for_status()
+            subs.append(r.json()["subscription_id"])
+        return subs
+
+
+async def signup_login(ctx: Context):
+    """Login storm with a steady trickle of new signups."""
+    accounts = [await ctx.signup("storm") for _ in range(ctx.concurrency)]
+
+    async def step(n: int, i: int):
+        if i % 4 == 3:
+            await ctx.request("POST /auth/signup", "POST", "/auth/signup",
+                              json={"email": ctx.unique_email("storm"), "password": PASSWORD})
+        else:
+            await ctx.request("POST /auth/login", "POST", "/auth/login",
+                              json={"email": accounts[n][0], "password": PASSWORD})
+
+    await ctx.run_for(step)
+
+
+async def catalog(ctx: Context):
+    """Plan browsing, half of it revalidating with If-None-Match."""
+    etag = (await ctx.client.get("/catalog/plans")).headers.get("etag", "")
+
+    async def step(n: int, i: int):
+        if i % 2:
+            await ctx.request("GET /catalog/plans (304)", "GET", "/catalog/plans",
+                              headers={"If-None-Match": etag}, ok=(304,))
+        else:
+            await ctx.request("GET /catalog/plans", "GET", "/catalog/plans")
+
+    await ctx.run_for(step)
+
+
+async def orders(ctx: Context):
+    """Order placement; every tenth request is a retry that reuses an Idempotency-Key."""
+    plan_id = await ctx.plan_id()
+    users = [(await ctx.signup("buyer"))[1] for _ in range(ctx.concurrency)]
+    last_key: dict[int, str] = {}
+
+    async def step(n: int, i: int):
+        if i % 10 == 9 and n in last_key:
+            await ctx.request("POST /orders (replay)", "POST", "/orders", json={"plan_id": plan_id},
+                              headers={**users[n], "Idempotency-Key": last_key[n]})
+            return
+        last_key[n] = uuid.uuid4().hex
+        await ctx.request("POST /orders", "POST", "/orders", json={"plan_id": plan_id},
+                          headers={**users[n], "Idempotency-Key": last_key[n]})
+
+    await ctx.run_for(step)
+
+
+async def usage_polling(ctx: Context, subs_per_user: int = 5):
+    """Dashboards polling subscription lists and usage, cached and live."""
+    plan_id, admin = await ctx.plan_id(), await ctx.admin()
+    users = []
+    for _ in range(ctx.concurrency):
+        _, headers = await ctx.signup("poller")
+        subs = await ctx.place_orders(headers, plan_id, subs_per_user)
+        users.append((headers, subs))
+    all_subs = [s for _, subs in users for s in subs]
+    r = await ctx.client.post("/admin/provision/bulk", json={"subscription_ids": all_subs}, headers=admin, timeout=120)
+    r.raise_for_status()
+
+    async def step(n: int, i: int):
+        headers, subs = users[n]
+        sub = subs[i % len(subs)]
+        kind = i % 3
+        if kind == 0:
+            await ctx.request("GET /subscriptions", "GET", "/subscriptions", headers=headers)
+        elif kind == 1:
+            await ctx.request("GET /subscriptions/{id}/usage", "GET", f"/subscriptions/{sub}/usage", headers=headers)
+        else:
+            await ctx.request("GET /subscriptions/{id}/usage?live", "GET", f"/subscriptions/{sub}/usage?live=true",
+                              headers=headers)
+
+    await ctx.run_for(step)
+
+
+async def bulk_provision(ctx: Context, batch: int = 20):
+    """Admins provisioning freshly paid subscriptions in batches."""
+    plan_id, admin = await ctx.plan_id(), await ctx.admin()
+    buyers = [(await ctx.signup("bulk"))[1] for _ in range(ctx.concurrency)]
+
+    async def step(n: int, i: int):
+        subs = await ctx.place_orders(buyers[n], plan_id, batch)
+        r = await ctx.request("POST /admin/provision/bulk", "POST", "/admin/provision/bulk",
+                              json={"subscription_ids": subs}, headers=admin, timeout=120)
+        if r is not None:
+            ctx.recorder.items["provisioned"] += r.json()["succeeded"]
+
+    await ctx.run_for(step)
+
+
+SCENARIOS = {
+    "signup_login": signup_login,
+    "catalog": catalog,
+    "orders": orders,
+    "usage_polling": usage_polling,
+    "bulk_provision": bulk_provision,
+}
@@ -0,0 +1,109 @@
+"""Minimal stand-in for a Marzban/Sanaei panel used by the benchmarks.
+
+Run standalone with ``python -m benchmarks.stub_panel --port 9001`` or start
+one in-process with ``StubPanel(...).start()``.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def build_app(latency_ms: float = 0.0, error_rate: float = 0.0) -> Starlette:
+    users: dict[str, dict] = {}
+
+    async def _delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            return JSONResponse({"detail": "stub failure"}, status_code=503)
+        return None
+
+    async def create_user(request):
+        if (err := await _delay()) is not None:
+            return err
+        data = await request.json()
+        user = {"id": uuid.uuid4().hex, "username": data["username"], "quota_gb": data.get("quota_gb"), "used_gb": 0.0}
+        users[data["username"]] = user
+        return JSONResponse(user)
+
+    async def get_usage(request):
+        if (err := await _delay()) is not None:
+            return err
+        user = users.get(request.path_params["username"])
+        if user is None:
+            return JSONResponse({"detail": "User not found"}, status_code=404)
+        user["used_gb"] = round(user["used_gb"] + random.random(), 3)
+        return JSONResponse({"username": user["username"], "used_gb": user["used_gb"]})
+
+    async def update_user(request):
+        if (err := await _delay()) is not None:
+            return err
+        user = users.get(request.path_params["username"])
+        if user is None:
+            return JSONResponse({"detail": "User not found"}, status_code=404)
+        user.update(await request.json())
+        return JSONResponse(user)
+
+    async def health(request):
+        return JSONResponse({"status": "ok", "users": len(users)})
+
+    return Starlette(routes=[
+        Route("/users", create_user, methods=["POST"]),
+        Route("/users/{username}", update_user, methods=["PUT"]),
+        Route("/users/{username}/usage", get_usage),
+        Route("/health", health),
+    ])
+
+
+class StubPanel:
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port or _free_port(host)
+        self.app = build_app(latency_ms, error_rate)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", backlog=4096))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "StubPanel":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9001)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    uvicorn.run(build_app(args.latency_ms, args.error_rate), host=args.host, port=args.port, log_level="warning")
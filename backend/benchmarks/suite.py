@@ -0,0 +1,183 @@
+"""Benchmark suite: realistic scenarios against the API with stub provider panels.
+
+Runs the app in-process over ``httpx.ASGITransport`` (``--mode asgi``,
+isolates the application) or as a real uvicorn server (``--mode uvicorn``),
+with local Marzban and Sanaei stand-ins whose latency and error rate are
+configurable. Per-route p50/p95/p99 and throughput go to a JSON file;
+``compare`` (or ``run --baseline``) exits non-zero when a route got slower or
+lost throughput beyond the threshold.
+
+    python -m benchmarks.suite run --mode asgi --seconds 10 --out bench.json
+    python -m benchmarks.suite run --baseline baseline.json --threshold 0.15
+    python -m benchmarks.suite compare bench.json baseline.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .harness import QUIET_ENV, REPO_DIR, start_server, stop_server
+from .scenarios import SCENARIOS, Context
+from .stub_panel import StubPanel, _free_port
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.asynccontextmanager
+async def asgi_client(env: dict, limits: httpx.Limits):
+    os.environ.update(env)
+    from app.main import app
+    from app.migrate import upgrade
+
+    await upgrade()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=60, limits=limits) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(env: dict, limits: httpx.Limits, workers: int):
+    port = _free_port("127.0.0.1")
+    extra = ["--workers", str(workers)] if workers > 1 else None
+    proc = await asyncio.to_thread(start_server, port, env, extra_args=extra)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            yield client
+    finally:
+        await asyncio.to_thread(stop_server, proc)
+
+
+async def run_suite(args) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="vpnpanel-suite-"), "suite.db")
+    with StubPanel(args.panel_latency_ms, args.panel_error_rate) as marzban, \
+            StubPanel(args.panel_latency_ms, args.panel_error_rate) as sanaei:
+        env = {
+            **QUIET_ENV,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "MARZBAN_API_URL": marzban.url,
+            "SANAEI_API_URL": sanaei.url,
+        }
+        limits = httpx.Limits(max_connections=args.concurrency + 8, max_keepalive_connections=args.concurrency + 8)
+        client_cm = asgi_client(env, limits) if args.mode == "asgi" else uvicorn_client(env, limits, args.workers)
+        results = {}
+        async with client_cm as client:
+            for name in args.scenarios:
+                ctx = Context(client, db_path, args.seconds, args.concurrency)
+                await SCENARIOS[name](ctx)
+                results[name] = ctx.recorder.summary()
+                _print_scenario(name, results[name])
+    return {
+        "meta": {
+            "mode": args.mode,
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "panel_latency_ms": args.panel_latency_ms,
+            "panel_error_rate": args.panel_error_rate,
+        },
+        "scenarios": results,
+    }
+
+
+def _print_scenario(name: str, result: dict):
+    print(f"\n{name} ({result['seconds']}s)")
+    for route, r in result["routes"].items():
+        print(f"  {route:<36} {r['rps']:>8} req/s  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms"
+              f"  p99 {r['p99_ms']:>8} ms  errors {r['errors']}")
+    for item, rate in result["items_per_s"].items():
+        print(f"  {item:<36} {rate:>8} /s")
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Print a route-by-route comparison; returns the regressions found."""
+    for key in ("mode", "workers", "concurrency", "panel_latency_ms", "panel_error_rate"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: {key} differs (baseline {baseline['meta'].get(key)!r}, current {current['meta'].get(key)!r})")
+    regressions = []
+    for scenario, base in baseline["scenarios"].items():
+        routes = current["scenarios"].get(scenario, {}).get("routes", {})
+        for route, b in base["routes"].items():
+            c = routes.get(route)
+            if c is None:
+                continue
+            checks = [
+                ("rps", c["rps"] < b["rps"] * (1 - threshold)),
+                ("p95_ms", c["p95_ms"] > b["p95_ms"] * (1 + threshold) and c["p95_ms"] - b["p95_ms"] > min_delta_ms),
+            ]
+            for metric, regressed in checks:
+                change = (c[metric] - b[metric]) / b[metric] * 100 if b[metric] else 0.0
+                flag = "REGRESSION" if regressed else "ok"
+                print(f"{scenario:<15} {route:<36} {metric:<7} {b[metric]:>9} -> {c[metric]:>9}  {change:>+7.1f}%  {flag}")
+                if regressed:
+                    regressions.append(f"{scenario} {route} {metric}")
+    return regressions
+
+
+def _report(regressions: list[str]):
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): " + "; ".join(regressions))
+        sys.exit(1)
+    print("\nno regressions")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run scenarios and write results")
+    run.add_argument("--mode", choices=("asgi", "uvicorn"), default="asgi")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    run.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    run.add_argument("--seconds", type=float, default=10)
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--panel-latency-ms", type=float, default=20.0)
+    run.add_argument("--panel-error-rate", type=float, default=0.0)
+    run.add_argument("--out", default="bench-results.json")
+    run.add_argument("--baseline", help="results file to compare against after the run")
+
+    cmp_ = sub.add_parser("compare", help="compare two results files")
+    cmp_.add_argument("current")
+    cmp_.add_argument("baseline")
+
+    for p in (run, cmp_):
+        p.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression (0.15 = 15%%)")
+        p.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = ap.parse_args()
+
+    if args.command == "run":
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            ap.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        results = asyncio.run(run_suite(args))
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.out}")
+        if args.baseline:
+            with open(args.baseline) as f:
+                _report(compare(results, json.load(f), args.threshold, args.min_delta_ms))
+    else:
+        with open(args.current) as f, open(args.baseline) as g:
+            _report(compare(json.load(f), json.load(g), args.threshold, args.min_delta_ms))
+
+
+if __name__ == "__main__":
+    main()
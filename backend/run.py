@@ -1,3 +1,5 @@
 import uvicorn
+from app.migrate import main as migrate
 if __name__ == '__main__':
+    migrate([])
     uvicorn.run('app.main:app', host='0.0.0.0', port=8000, reload=True)
@@ -0,0 +1,95 @@
+"""Shared test setup: a throwaway SQLite database and no background loops.
+
+Settings are read when ``app.config`` is first imported, so the environment
+is set here before any test module imports the app.
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/test.db",
+    "RATE_LIMIT_SQLITE_PATH": f"{tempfile.mkdtemp()}/ratelimit.db",
+    "AUTO_PROVISION_ORDERS": "false",
+    "PROVISION_WORKERS": "0",
+    "USAGE_SYNC_ENABLED": "false",
+    "ENFORCEMENT_INTERVAL_SECONDS": "0",
+    "REFRESH_TOKEN_PURGE_INTERVAL_SECONDS": "0",
+    "PROVIDER_HEALTH_INTERVAL_SECONDS": "0",
+    "PROVIDER_RETRY_BACKOFF": "0",
+    "PASSWORD_HASH_WORKERS": "0",
+    "BCRYPT_ROUNDS": "4",
+    "RATE_LIMIT_PER_MINUTE": "100000",
+    "LOGIN_THROTTLE_ATTEMPTS": "1000",
+    "MARZBAN_API_URL": "",
+    "SANAEI_API_URL": "",
+})
+
+import pytest  # noqa: E402
+
+
+def run(coro):
+    """Run ``coro`` on a fresh loop; pooled aiosqlite connections are bound to it, so drop them after."""
+    from app.database import engine
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session")
+def schema():
+    from app import migrate
+    run(migrate.upgrade())
+
+
+@pytest.fixture
+def database(schema):
+    """A migrated database with every table emptied before the test."""
+    from sqlalchemy import delete
+    from app.database import Base, engine
+
+    async def wipe():
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(delete(table))
+
+    run(wipe())
+
+
+@pytest.fixture
+def api(database):
+    """A TestClient with the app's lifespan running."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def sql(statement: str, *params):
+    """Run one statement on the test database, as an operator or another worker would."""
+    import sqlite3
+    from app.config import settings
+
+    with sqlite3.connect(settings.DATABASE_URL.removeprefix("sqlite:///")) as conn:
+        return conn.execute(statement, params).fetchall()
+
+
+def signup(api, email: str, admin: bool = False) -> dict:
+    """Create a user and return the token pair of a fresh login."""
+    creds = {"email": email, "password": "test-password"}
+    api.post("/auth/signup", json=creds).raise_for_status()
+    if admin:
+        sql("UPDATE users SET is_admin = 1 WHERE email = ?", email)
+    res = api.post("/auth/login", json=creds)
+    res.raise_for_status()
+    return res.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
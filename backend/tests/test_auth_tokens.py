@@ -0,0 +1,101 @@
+import time
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+from app import security
+from app.config import settings
+from app.database import engine
+from app.security import TokenCache, create_access_token, decode_token
+from conftest import bearer, signup, sql
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    real = security.decode_token
+
+    def counting(token):
+        calls.append(token)
+        return real(token)
+
+    monkeypatch.setattr(security, "decode_token", counting)
+    return calls
+
+
+def test_verified_tokens_are_cached(decodes):
+    cache = TokenCache(max_entries=10)
+    token = create_access_token(7, is_admin=True)
+    first, second = cache.decode(token), cache.decode(token)
+    assert first is second
+    assert (first["sub"], first["adm"]) == ("7", True)
+    assert len(decodes) == 1
+
+
+def test_cache_is_bounded(decodes):
+    cache = TokenCache(max_entries=2)
+    a, b, c = (create_access_token(i) for i in range(3))
+    for token in (a, b, c, a):
+        cache.decode(token)
+    assert len(cache) == 2
+    assert len(decodes) == 4  # a was evicted by c
+
+
+def test_expired_entries_are_not_served(decodes):
+    cache = TokenCache(max_entries=10)
+    token = create_access_token(1)
+    cache.decode(token)["exp"] = time.time() - 1  # as if the token's lifetime had passed
+    cache.decode(token)
+    assert len(decodes) == 2
+
+
+def test_tampered_token_is_rejected():
+    token = create_access_token(1)
+    with pytest.raises(jwt.InvalidTokenError):
+        TokenCache(max_entries=10).decode(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+
+
+def test_non_admin_token_is_refused_on_admin_routes(api):
+    user = signup(api, "user@example.com")
+    assert api.get("/admin/refresh-tokens/stats", headers=bearer(user)).status_code == 403
+
+
+def test_admin_routes_trust_the_token_claim(api):
+    admin = signup(api, "admin@example.com", admin=True)
+    statements = []
+
+    def record(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        assert api.get("/admin/refresh-tokens/stats", headers=bearer(admin)).status_code == 200
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert not [s for s in statements if "FROM users" in s]
+
+
+def test_admin_tokens_are_short_lived():
+    admin, user = decode_token(create_access_token(1, is_admin=True)), decode_token(create_access_token(2))
+    assert admin["exp"] - admin["iat"] == settings.ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    assert user["exp"] - user["iat"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def test_demotion_applies_from_the_next_refresh(api):
+    root = signup(api, "root@example.com", admin=True)
+    admin = signup(api, "admin@example.com", admin=True)
+    admin_id = sql("SELECT id FROM users WHERE email = 'admin@example.com'")[0][0]
+    res = api.post(f"/admin/users/{admin_id}/admin", json={"is_admin": False}, headers=bearer(root))
+    assert res.status_code == 200
+    fresh = api.post("/auth/refresh", json={"refresh_token": admin["refresh_token"]}).json()
+    assert decode_token(fresh["access_token"])["adm"] is False
+    assert api.get("/admin/refresh-tokens/stats", headers=bearer(fresh)).status_code == 403
+
+
+def test_refreshed_token_carries_the_new_role(api):
+    user = signup(api, "promoted@example.com")
+    sql("UPDATE users SET is_admin = 1 WHERE email = 'promoted@example.com'")
+    assert api.get("/admin/refresh-tokens/stats", headers=bearer(user)).status_code == 403
+    fresh = api.post("/auth/refresh", json={"refresh_token": user["refresh_token"]}).json()
+    assert api.get("/admin/refresh-tokens/stats", headers=bearer(fresh)).status_code == 200
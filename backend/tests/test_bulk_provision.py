@@ -0,0 +1,111 @@
+from sqlalchemy import select
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.routers import admin
+from app.schemas import BulkProvisionRequest
+from conftest import bearer, run, signup
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.created = []
+        self.fail = fail
+
+    async def create_user(self, username, password, quota_gb, days):
+        self.created.append(username)
+        if self.fail:
+            return {"error": "HTTP 500: boom"}
+        return {"id": username}
+
+
+async def _seed(db):
+    user = models.User(email="bulk@example.com", password_hash="x")
+    plan = models.Plan(name="bulk", price=1.0)
+    db.add_all([user, plan])
+    await db.flush()
+
+    def sub(order_status=None, job_status=None):
+        s = models.Subscription(user_id=user.id, plan_id=plan.id)
+        db.add(s)
+        if order_status:
+            db.add(models.Order(user_id=user.id, plan_id=plan.id, amount=1.0, status=order_status, subscription=s))
+        if job_status:
+            db.add(models.ProvisionJob(subscription=s, provider="marzban", status=job_status))
+        return s
+
+    subs = {
+        "paid": sub("paid"),
+        "pending": sub("pending"),
+        "running": sub("paid", "running"),
+        "queued": sub("paid", "queued"),
+        "failing": sub("paid"),
+    }
+    await db.commit()
+    return {name: s.id for name, s in subs.items()}
+
+
+def _bulk(monkeypatch, client, request):
+    monkeypatch.setattr(admin, "get_client", lambda provider, node_id=None: client)
+    monkeypatch.setattr(admin, "place", lambda provider: (client, None))
+
+    async def main():
+        async with SessionLocal() as db:
+            ids = await _seed(db)
+            res = await admin.provision_bulk(BulkProvisionRequest(provider="marzban", **request(ids)), db, 1)
+            jobs = {sid: status for sid, status in await db.execute(
+                select(models.ProvisionJob.subscription_id, models.ProvisionJob.status))}
+            return ids, res, jobs
+
+    return run(main())
+
+
+def test_filter_only_takes_paid_subscriptions_without_pending_jobs(database, monkeypatch):
+    client = FakeClient()
+    ids, res, jobs = _bulk(monkeypatch, client, lambda ids: {"filter": "paid_unprovisioned"})
+    assert {r["subscription_id"] for r in res["results"]} == {ids["paid"], ids["failing"]}
+    assert res["succeeded"] == 2
+    assert jobs[ids["paid"]] == jobs[ids["failing"]] == "done"
+    assert jobs[ids["running"]] == "running" and jobs[ids["queued"]] == "queued"
+    assert ids["pending"] not in jobs
+
+
+def test_explicit_ids_skip_running_jobs_and_claim_queued_ones(database, monkeypatch):
+    client = FakeClient()
+    ids, res, jobs = _bulk(monkeypatch, client, lambda ids: {"subscription_ids": [ids["running"], ids["queued"]]})
+    by_id = {r["subscription_id"]: r for r in res["results"]}
+    assert by_id[ids["running"]] == {"subscription_id": ids["running"], "ok": False,
+                                     "error": "Provisioning already in progress"}
+    assert by_id[ids["queued"]]["ok"]
+    assert len(client.created) == 1
+    assert jobs[ids["queued"]] == "done" and jobs[ids["running"]] == "running"
+
+
+def test_failures_are_left_queued_for_the_workers(database, monkeypatch):
+    ids, res, _ = _bulk(monkeypatch, FakeClient(fail=True), lambda ids: {"subscription_ids": [ids["failing"]]})
+    assert res["failed"] == 1
+
+    async def job():
+        async with SessionLocal() as db:
+            return await db.scalar(select(models.ProvisionJob).where(models.ProvisionJob.subscription_id == ids["failing"]))
+
+    failed = run(job())
+    assert (failed.status, failed.attempts, failed.last_error) == ("queued", 1, "HTTP 500: boom")
+    assert failed.locked_at is None
+
+
+def test_limit_only_applies_to_the_filter(database, monkeypatch):
+    client = FakeClient()
+    ids, res, _ = _bulk(monkeypatch, client, lambda ids: {"subscription_ids": [ids["paid"], ids["pending"],
+                                                                                ids["failing"]], "limit": 1})
+    assert res["succeeded"] == 3 and len(client.created) == 3
+
+
+def test_too_many_ids_or_a_bad_limit_are_rejected(api, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_PROVISION_MAX_ITEMS", 2)
+    admin_headers = bearer(signup(api, "admin@example.com", admin=True))
+    res = api.post("/admin/provision/bulk", json={"subscription_ids": [1, 2, 3]}, headers=admin_headers)
+    assert res.status_code == 422
+    res = api.post("/admin/provision/bulk", json={"filter": "paid_unprovisioned", "limit": -1}, headers=admin_headers)
+    assert res.status_code == 422
@@ -0,0 +1,31 @@
+from app.config import settings
+from conftest import bearer, signup, sql
+
+
+def _plan(api, name="Basic 30d / 50GB"):
+    return next(p for p in api.get("/catalog/plans").json() if p["name"] == name)
+
+
+def test_conditional_request_gets_304(api):
+    res = api.get("/catalog/plans")
+    assert res.status_code == 200 and res.json()
+    again = api.get("/catalog/plans", headers={"If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == res.headers["etag"]
+
+
+def test_edits_from_another_worker_show_up_after_the_refresh_interval(api, monkeypatch):
+    plan = _plan(api)
+    sql("UPDATE plans SET price = 99 WHERE id = ?", plan["id"])
+    assert _plan(api)["price"] == plan["price"]  # still within the refresh interval
+    monkeypatch.setattr(settings, "CATALOG_REFRESH_SECONDS", 0)
+    assert _plan(api)["price"] == 99
+
+
+def test_orders_are_charged_the_current_price(api, monkeypatch):
+    user = signup(api, "buyer@example.com")
+    plan = _plan(api)
+    sql("UPDATE plans SET price = 42 WHERE id = ?", plan["id"])
+    monkeypatch.setattr(settings, "CATALOG_REFRESH_SECONDS", 0)
+    order = api.post("/orders", json={"plan_id": plan["id"]}, headers=bearer(user)).json()
+    assert order["amount"] == 42
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.database import SessionLocal
+from app.services import enforcement
+from conftest import run
+
+
+class FakeClient:
+    def __init__(self):
+        self.disabled = []
+        self.failing = set()
+
+    async def disable_users(self, usernames, concurrency=10):
+        self.disabled.extend(usernames)
+        return {u for u in usernames if u not in self.failing}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(enforcement, "get_client", lambda provider, node_id=None: fake)
+    return fake
+
+
+async def _seed(**subs) -> dict[str, int]:
+    """Each value is (external_username, expires_in_days, used_gb, next_check_in_days)."""
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        user = models.User(email="enforce@example.com", password_hash="x")
+        plan = models.Plan(name="enforce", price=1.0)
+        db.add_all([user, plan])
+        await db.flush()
+        rows = {}
+        for name, (username, expires_in, used_gb, check_in) in subs.items():
+            rows[name] = models.Subscription(
+                user_id=user.id, plan_id=plan.id, external_username=username, quota_gb=50.0, used_gb=used_gb,
+                expires_at=now + timedelta(days=expires_in), next_check_at=now + timedelta(days=check_in))
+        db.add_all(rows.values())
+        await db.commit()
+        return {name: sub.id for name, sub in rows.items()}
+
+
+async def _subs() -> dict[int, models.Subscription]:
+    async with SessionLocal() as db:
+        return {s.id: s for s in (await db.scalars(select(models.Subscription))).all()}
+
+
+def test_due_subscriptions_are_disabled_and_suspended(database, client):
+    async def main():
+        ids = await _seed(
+            expired=("u_expired", -1, 0.0, -1),
+            over_quota=("u_over", 10, 60.0, -0.01),
+            never_provisioned=(None, -1, 0.0, -1),
+            healthy=("u_ok", 10, 1.0, 10),
+        )
+        totals = await enforcement.enforce_once(batch_size=2)
+        return ids, totals, await _subs()
+
+    ids, totals, subs = run(main())
+    assert (totals["expired"], totals["over_quota"], totals["failed"]) == (2, 1, 0)
+    assert sorted(client.disabled) == ["u_expired", "u_over"]
+    for name, reason in (("expired", "expired"), ("over_quota", "over_quota"), ("never_provisioned", "expired")):
+        sub = subs[ids[name]]
+        assert (sub.status, sub.suspended_reason, sub.next_check_at) == ("suspended", reason, None)
+    assert subs[ids["healthy"]].status == "active"
+
+
+def test_failed_disables_are_retried_later(database, client):
+    client.failing.add("u_expired")
+
+    async def main():
+        ids = await _seed(expired=("u_expired", -1, 0.0, -1))
+        totals = await enforcement.enforce_once()
+        return ids, totals, await _subs()
+
+    ids, totals, subs = run(main())
+    sub = subs[ids["expired"]]
+    assert totals["failed"] == 1
+    assert sub.status == "active"
+    assert sub.next_check_at > datetime.utcnow() + timedelta(seconds=60)
+
+
+def test_rows_no_longer_due_are_rescheduled_to_expiry(database, client):
+    async def main():
+        ids = await _seed(back_under_quota=("u_back", 10, 10.0, -1))
+        totals = await enforcement.enforce_once()
+        return ids, totals, await _subs()
+
+    ids, totals, subs = run(main())
+    sub = subs[ids["back_under_quota"]]
+    assert totals["rescheduled"] == 1 and not client.disabled
+    assert (sub.status, sub.next_check_at) == ("active", sub.expires_at)
+
+
+def test_a_second_pass_is_a_no_op(database, client):
+    async def main():
+        await _seed(expired=("u_expired", -1, 0.0, -1))
+        await enforcement.enforce_once()
+        return await enforcement.enforce_once()
+
+    totals = run(main())
+    assert (totals["expired"], totals["over_quota"], totals["failed"], totals["rescheduled"]) == (0, 0, 0, 0)
+    assert client.disabled == ["u_expired"]
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import bearer, signup, sql
+
+SUBSCRIPTIONS = [
+    # provider, external_username, expires_at, used_gb, quota_gb, status
+    ("marzban", "u_active", "2099-01-01 00:00:00", 1.0, 50.0, "active"),
+    ("sanaei", "u_suspended", "2099-01-01 00:00:00", 1.0, 50.0, "suspended"),
+    ("marzban", "u_expired", "2000-01-01 00:00:00", 1.0, 50.0, "active"),
+    ("marzban", "u_over", "2099-01-01 00:00:00", 60.0, 50.0, "active"),
+    ("marzban", None, "2099-01-01 00:00:00", 0.0, 50.0, "active"),
+]
+
+
+@pytest.fixture
+def admin(api):
+    headers = bearer(signup(api, "exports@example.com", admin=True))
+    user_id, plan_id = sql("SELECT id FROM users")[0][0], sql("SELECT id FROM plans")[0][0]
+    for row in SUBSCRIPTIONS:
+        sql("INSERT INTO subscriptions (user_id, plan_id, provider, external_username, expires_at, used_gb, quota_gb,"
+            " status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", user_id, plan_id, *row)
+    sub = {name: sid for sid, name in sql("SELECT id, external_username FROM subscriptions")}
+    for status, sub_id, created_at in (("paid", sub["u_active"], "2024-01-01 00:00:00"),
+                                       ("pending", sub["u_suspended"], "2024-06-01 00:00:00"),
+                                       ("paid", None, "2025-01-01 00:00:00")):
+        sql("INSERT INTO orders (user_id, plan_id, status, amount, subscription_id, created_at)"
+            " VALUES (?, ?, ?, 1.0, ?, ?)", user_id, plan_id, status, sub_id, created_at)
+    return headers
+
+
+def _ndjson(api, headers, path, **params) -> list[dict]:
+    res = api.get(f"/admin/exports/{path}", params=params, headers=headers)
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in res.text.splitlines()]
+
+
+def _names(rows) -> list:
+    return [r["external_username"] for r in rows]
+
+
+def test_exports_are_admin_only(api):
+    assert api.get("/admin/exports/subscriptions").status_code == 401
+    user = bearer(signup(api, "plain@example.com"))
+    for path in ("subscriptions", "orders", "usage"):
+        assert api.get(f"/admin/exports/{path}", headers=user).status_code == 403
+
+
+def test_csv_has_a_header_and_blank_nulls(api, admin):
+    res = api.get("/admin/exports/subscriptions", params={"format": "csv"}, headers=admin)
+    assert res.headers["content-type"] == "text/csv; charset=utf-8"
+    assert res.headers["content-disposition"].startswith('attachment; filename="subscriptions-')
+    header, *rows = list(csv.reader(io.StringIO(res.text)))
+    assert header[:3] == ["id", "user_id", "plan_id"]
+    by_name = {row[header.index("external_username")]: row for row in rows}
+    assert len(rows) == 5
+    assert by_name["u_over"][header.index("used_gb")] == "60.0"
+    assert by_name[""][header.index("node_id")] == ""
+    assert by_name["u_expired"][header.index("expires_at")] == "2000-01-01T00:00:00"
+
+
+def test_ndjson_rows(api, admin):
+    rows = _ndjson(api, admin, "subscriptions")
+    assert _names(rows) == [name for _, name, *_ in SUBSCRIPTIONS]
+    assert rows[0]["provider"] == "marzban" and rows[0]["node_id"] is None
+
+
+def test_keyset_pagination(api, admin):
+    first = _ndjson(api, admin, "subscriptions", limit=2)
+    rest = _ndjson(api, admin, "subscriptions", limit=2, after_id=first[-1]["id"])
+    last = _ndjson(api, admin, "subscriptions", limit=2, after_id=rest[-1]["id"])
+    assert _names(first + rest + last) == [name for _, name, *_ in SUBSCRIPTIONS]
+    assert len(last) == 1
+    assert _ndjson(api, admin, "subscriptions", after_id=last[-1]["id"]) == []
+    assert api.get("/admin/exports/subscriptions", params={"limit": 0}, headers=admin).status_code == 422
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"provider": "sanaei"}, ["u_suspended"]),
+    ({"expires_before": "2050-01-01T00:00:00"}, ["u_expired"]),
+    ({"expires_after": "2050-01-01T00:00:00"}, ["u_active", "u_suspended", "u_over", None]),
+    ({"status": "active"}, ["u_active", "u_expired", "u_over", None]),
+    ({"status": "suspended"}, ["u_suspended"]),
+    ({"status": "expired"}, ["u_expired"]),
+    ({"status": "over_quota"}, ["u_over"]),
+    ({"status": "unprovisioned"}, [None]),
+])
+def test_subscription_filters(api, admin, params, expected):
+    assert _names(_ndjson(api, admin, "subscriptions", **params)) == expected
+
+
+def test_usage_skips_unprovisioned_rows(api, admin):
+    rows = _ndjson(api, admin, "usage")
+    assert _names(rows) == ["u_active", "u_suspended", "u_expired", "u_over"]
+    assert rows[-1]["usage_pct"] == 120.0
+    assert _names(_ndjson(api, admin, "usage", status="over_quota")) == ["u_over"]
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({}, ["2024-01-01", "2024-06-01", "2025-01-01"]),
+    ({"status": "paid"}, ["2024-01-01", "2025-01-01"]),
+    ({"created_after": "2024-03-01T00:00:00"}, ["2024-06-01", "2025-01-01"]),
+    ({"created_before": "2024-03-01T00:00:00"}, ["2024-01-01"]),
+    ({"provider": "sanaei"}, ["2024-06-01"]),
+    ({"expires_after": "2050-01-01T00:00:00"}, ["2024-01-01", "2024-06-01"]),
+])
+def test_order_filters(api, admin, params, expected):
+    assert [r["created_at"][:10] for r in _ndjson(api, admin, "orders", **params)] == expected
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.services import jobs
+from conftest import run
+
+
+class FakeClient:
+    def __init__(self):
+        self.created = []
+        self.fail = False
+
+    async def create_user(self, username, password, quota_gb, days):
+        self.created.append(username)
+        return {"error": "HTTP 500: boom"} if self.fail else {"id": username}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(jobs, "place", lambda provider: (fake, None))
+    return fake
+
+
+async def _enqueue(**job) -> int:
+    async with SessionLocal() as db:
+        user = models.User(email="jobs@example.com", password_hash="x")
+        plan = models.Plan(name="jobs", price=1.0)
+        db.add_all([user, plan])
+        await db.flush()
+        sub = models.Subscription(user_id=user.id, plan_id=plan.id)
+        db.add(sub)
+        await db.flush()
+        new = await jobs.enqueue_provision(db, sub.id, "marzban")
+        for k, v in job.items():
+            setattr(new, k, v)
+        await db.commit()
+        return new.id
+
+
+async def _job(job_id: int) -> models.ProvisionJob:
+    async with SessionLocal() as db:
+        return await db.get(models.ProvisionJob, job_id)
+
+
+def test_enqueue_returns_the_pending_job(database):
+    async def main():
+        job_id = await _enqueue()
+        async with SessionLocal() as db:
+            job = await db.get(models.ProvisionJob, job_id)
+            again = await jobs.enqueue_provision(db, job.subscription_id, "marzban")
+            return job_id, again.id
+
+    first, second = run(main())
+    assert first == second
+
+
+def test_successful_job_provisions_the_subscription(database, client):
+    async def main():
+        job_id = await _enqueue()
+        assert await jobs.process_one()
+        assert not await jobs.process_one()  # nothing else is due
+        job = await _job(job_id)
+        async with SessionLocal() as db:
+            sub = await db.get(models.Subscription, job.subscription_id)
+        return job, sub
+
+    job, sub = run(main())
+    assert (job.status, job.attempts, job.locked_at) == ("done", 1, None)
+    assert sub.external_username == client.created[0]
+
+
+def test_failed_job_is_retried_with_backoff(database, client):
+    client.fail = True
+
+    async def main():
+        job_id = await _enqueue()
+        before = datetime.utcnow()
+        await jobs.process_one()
+        job = await _job(job_id)
+        assert not await jobs.process_one()  # backing off
+        return before, job
+
+    before, job = run(main())
+    assert (job.status, job.attempts, job.last_error) == ("queued", 1, "HTTP 500: boom")
+    assert job.next_run_at >= before + timedelta(seconds=settings.PROVISION_JOB_BACKOFF_SECONDS)
+
+
+def test_job_dies_after_max_attempts(database, client):
+    client.fail = True
+
+    async def main():
+        job_id = await _enqueue(attempts=settings.PROVISION_JOB_MAX_ATTEMPTS - 1)
+        await jobs.process_one()
+        return await _job(job_id)
+
+    job = run(main())
+    assert (job.status, job.attempts) == ("dead", settings.PROVISION_JOB_MAX_ATTEMPTS)
+
+
+def test_a_job_is_claimed_once(database):
+    async def main():
+        await _enqueue()
+        return await asyncio.gather(*(jobs._claim_next() for _ in range(5)))
+
+    claims = run(main())
+    assert sum(c is not None for c in claims) == 1
+
+
+def test_stale_jobs_are_requeued_until_attempts_run_out(database):
+    stale = datetime.utcnow() - timedelta(seconds=settings.PROVISION_JOB_LOCK_TIMEOUT_SECONDS + 60)
+
+    async def main():
+        retry = await _enqueue(status="running", locked_at=stale, attempts=1)
+        async with SessionLocal() as db:
+            job = await db.get(models.ProvisionJob, retry)
+            sub = models.Subscription(user_id=await db.scalar(select(models.User.id)),
+                                      plan_id=await db.scalar(select(models.Plan.id)))
+            db.add(sub)
+            await db.flush()
+            exhausted = models.ProvisionJob(subscription_id=sub.id, provider="marzban", status="running",
+                                            locked_at=stale, attempts=settings.PROVISION_JOB_MAX_ATTEMPTS)
+            fresh = models.ProvisionJob(subscription_id=job.subscription_id, provider="marzban", status="running",
+                                        locked_at=datetime.utcnow(), attempts=1)
+            db.add_all([exhausted, fresh])
+            await db.commit()
+        assert await jobs.recover_stale_jobs() == 2
+        return [await _job(i) for i in (retry, exhausted.id, fresh.id)]
+
+    retry, exhausted, fresh = run(main())
+    assert (retry.status, retry.locked_at) == ("queued", None)
+    assert (exhausted.status, exhausted.last_error) == ("dead", "worker lost the job")
+    assert fresh.status == "running"
@@ -0,0 +1,30 @@
+from app.config import settings
+from app.routers.metrics import _is_loopback
+
+
+def test_metrics_are_local_only_without_a_token(api, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert api.get("/metrics").status_code == 403  # TestClient is not a loopback address
+    assert _is_loopback("127.0.0.1") and _is_loopback("::1")
+    assert not _is_loopback("10.0.0.5") and not _is_loopback("testclient") and not _is_loopback(None)
+
+
+def test_metrics_token_is_required_when_set(api, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert api.get("/metrics").status_code == 401
+    assert api.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    res = api.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert res.status_code == 200
+    assert "http_requests_total" in res.text
+
+
+def test_requests_are_labelled_with_the_route_template(api, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    api.get("/catalog/plans")
+    api.get("/subscriptions/12345/usage")
+    api.get("/no/such/path")
+    api.get("/docs")
+    text = api.get("/metrics", headers={"Authorization": "Bearer s3cret"}).text
+    for route in ("/catalog/plans", "/subscriptions/{sub_id}/usage", "<unmatched>", "/docs"):
+        assert f'route="{route}"' in text, route
+    assert 'route="/subscriptions/12345/usage"' not in text
@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middlewares.rate_limit import RateLimitMiddleware
+from app.middlewares.security_headers import DEFAULT_HEADERS, SecurityHeadersMiddleware
+from app.services.rate_limiter import MemoryBackend
+
+
+def _app(calls: list | None = None) -> Starlette:
+    async def plain(request):
+        if calls is not None:
+            calls.append(request.url.path)
+        return PlainTextResponse("ok")
+
+    async def framed(request):
+        return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN", "Content-Security-Policy": "none"})
+
+    return Starlette(routes=[Route("/plain", plain), Route("/framed", framed)])
+
+
+def test_security_headers_are_added():
+    client = TestClient(SecurityHeadersMiddleware(_app()))
+    res = client.get("/plain")
+    for name, value in DEFAULT_HEADERS.items():
+        assert res.headers[name] == value
+    assert res.text == "ok"
+
+
+def test_headers_set_by_the_route_are_kept():
+    res = TestClient(SecurityHeadersMiddleware(_app())).get("/framed")
+    assert res.headers.get_list("x-frame-options") == ["SAMEORIGIN"]
+    assert res.headers.get_list("content-security-policy") == ["none"]
+    assert res.headers["x-content-type-options"] == "nosniff"
+
+
+def test_custom_header_set():
+    res = TestClient(SecurityHeadersMiddleware(_app(), headers={"X-Test": "1"})).get("/plain")
+    assert res.headers["x-test"] == "1"
+    assert "x-frame-options" not in res.headers
+
+
+def test_rejected_requests_never_reach_the_app():
+    calls = []
+    client = TestClient(RateLimitMiddleware(_app(calls), limit=2, window_seconds=60, backend=MemoryBackend()))
+    statuses = [client.get("/plain").status_code for _ in range(4)]
+    assert statuses == [200, 200, 429, 429]
+    assert calls == ["/plain", "/plain"]
+    res = client.get("/plain")
+    assert res.json() == {"detail": "Too Many Requests"}
+    assert res.headers["content-length"] == str(len(res.content))
+
+
+def test_limits_are_per_client_ip():
+    calls = []
+    app = RateLimitMiddleware(_app(calls), limit=1, window_seconds=60, backend=MemoryBackend())
+
+    def from_ip(ip):
+        async def shim(scope, receive, send):
+            await app({**scope, "client": (ip, 1000)}, receive, send)
+        return TestClient(shim)
+
+    first, second = from_ip("10.0.0.1"), from_ip("10.0.0.2")
+    assert [first.get("/plain").status_code, first.get("/plain").status_code] == [200, 429]
+    assert second.get("/plain").status_code == 200
+    assert len(calls) == 2
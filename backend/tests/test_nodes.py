@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from app import models
+from app.clients import registry
+from app.clients.breaker import CircuitBreaker
+from app.services import jobs, nodes
+from conftest import run
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(nodes, "_nodes", {})
+
+    def add(node_id, weight=1.0, capacity=0, enabled=True, provider="marzban"):
+        row = models.ProviderNode(id=node_id, provider=provider, name=f"node-{node_id}", api_url="http://panel.invalid",
+                                  token="t", capacity=capacity, weight=weight, enabled=enabled)
+        nodes._nodes[node_id] = nodes.Node(row)
+        return nodes._nodes[node_id]
+
+    return add
+
+
+def test_placement_follows_weight(pool):
+    a, b = pool(1, weight=1.0), pool(2, weight=2.0)
+    for _ in range(30):
+        nodes.place("marzban")
+    assert (a.load, b.load) == (10, 20)
+
+
+def test_placement_skips_full_disabled_and_broken_nodes(pool):
+    full, off, broken, ok = pool(1, capacity=1), pool(2, enabled=False), pool(3), pool(4)
+    full.load = 1
+    for _ in range(broken.breaker.threshold):
+        broken.breaker.failure()
+    assert [nodes.place("marzban").id for _ in range(3)] == [4, 4, 4]
+    assert nodes.place("sanaei") is None
+
+
+def test_registry_raises_when_no_node_is_available(pool):
+    pool(1, capacity=1).load = 1
+    with pytest.raises(LookupError):
+        registry.place("marzban")
+
+
+def test_release_gives_the_slot_back(pool):
+    node = pool(1)
+    _, node_id = registry.place("marzban")
+    registry.release(node_id)
+    registry.release(node_id)
+    registry.release(None)
+    assert node.load == 0
+
+
+def test_failed_provisioning_releases_the_node(database, pool, monkeypatch):
+    node = pool(1, capacity=1)
+
+    async def create_user(username, password, quota_gb, days):
+        return {"error": "HTTP 500: boom"}
+
+    monkeypatch.setattr(node.client, "create_user", create_user)
+
+    async def main():
+        from app.database import SessionLocal
+        async with SessionLocal() as db:
+            user = models.User(email="nodes@example.com", password_hash="x")
+            plan = models.Plan(name="nodes", price=1.0)
+            db.add_all([user, plan])
+            await db.flush()
+            sub = models.Subscription(user_id=user.id, plan_id=plan.id)
+            db.add(sub)
+            await db.flush()
+            await jobs.enqueue_provision(db, sub.id, "marzban")
+            await db.commit()
+        await jobs.process_one()
+
+    run(main())
+    assert node.load == 0 and node.available
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=60)
+    breaker.failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened_at = time.monotonic() - 61  # reset period is over
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call at a time
+    breaker.failure()
+    assert breaker.state == "open"  # a failed trial re-opens at once
+
+    breaker.opened_at = time.monotonic() - 61
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.closed and breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=60)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.closed
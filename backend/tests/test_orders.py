@@ -0,0 +1,43 @@
+from app.config import settings
+from conftest import bearer, signup, sql
+
+
+def _plans(api) -> list[int]:
+    return [p["id"] for p in api.get("/catalog/plans").json()]
+
+
+def test_replay_with_the_same_key_returns_the_original_order(api, monkeypatch):
+    monkeypatch.setattr(settings, "AUTO_PROVISION_ORDERS", True)
+    headers = {**bearer(signup(api, "buyer@example.com")), "Idempotency-Key": "order-1"}
+    plan_id = _plans(api)[0]
+    first = api.post("/orders", json={"plan_id": plan_id}, headers=headers).json()
+    again = api.post("/orders", json={"plan_id": plan_id}, headers=headers).json()
+    assert again == first
+    assert first["provision_job_id"] is not None
+    assert sql("SELECT COUNT(*) FROM orders") == [(1,)]
+    assert sql("SELECT COUNT(*) FROM subscriptions") == [(1,)]
+    assert sql("SELECT COUNT(*) FROM provision_jobs") == [(1,)]
+
+
+def test_reusing_a_key_for_another_plan_is_a_conflict(api):
+    headers = {**bearer(signup(api, "buyer@example.com")), "Idempotency-Key": "order-1"}
+    first, second = _plans(api)[:2]
+    assert api.post("/orders", json={"plan_id": first}, headers=headers).status_code == 200
+    assert api.post("/orders", json={"plan_id": second}, headers=headers).status_code == 409
+    assert sql("SELECT COUNT(*) FROM orders") == [(1,)]
+
+
+def test_keys_are_scoped_to_the_user(api):
+    plan_id = _plans(api)[0]
+    a = api.post("/orders", json={"plan_id": plan_id},
+                 headers={**bearer(signup(api, "a@example.com")), "Idempotency-Key": "same"}).json()
+    b = api.post("/orders", json={"plan_id": plan_id},
+                 headers={**bearer(signup(api, "b@example.com")), "Idempotency-Key": "same"}).json()
+    assert a["id"] != b["id"]
+
+
+def test_orders_without_a_key_are_not_deduplicated(api):
+    headers = bearer(signup(api, "buyer@example.com"))
+    plan_id = _plans(api)[0]
+    ids = {api.post("/orders", json={"plan_id": plan_id}, headers=headers).json()["id"] for _ in range(2)}
+    assert len(ids) == 2
@@ -0,0 +1,40 @@
+import os
+
+from passlib.context import CryptContext
+
+from app import security
+from app.config import settings
+from conftest import signup, sql
+
+CREDS = {"email": "hash@example.com", "password": "test-password"}
+
+
+def test_hashing_runs_in_the_process_pool(api, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    security.start_password_pool()
+    try:
+        pids = set(security._hash_pool._processes)
+        assert pids and os.getpid() not in pids
+        signup(api, CREDS["email"])
+        assert api.post("/auth/login", json={**CREDS, "password": "wrong"}).status_code == 401
+        assert set(security._hash_pool._processes) == pids  # the same workers served every call
+    finally:
+        security.shutdown_password_pool()
+    assert security._hash_pool is None
+    assert security.verify_password(CREDS["password"], sql("SELECT password_hash FROM users")[0][0])
+
+
+def test_login_upgrades_a_hash_made_with_another_cost(api):
+    signup(api, CREDS["email"])
+    old = CryptContext(schemes=["bcrypt"], bcrypt__rounds=settings.BCRYPT_ROUNDS + 1).hash(CREDS["password"])
+    sql("UPDATE users SET password_hash = ?", old)
+    assert security.password_needs_rehash(old)
+
+    assert api.post("/auth/login", json={**CREDS, "password": "wrong"}).status_code == 401
+    assert sql("SELECT password_hash FROM users") == [(old,)]  # only a successful login rehashes
+
+    assert api.post("/auth/login", json=CREDS).status_code == 200
+    new = sql("SELECT password_hash FROM users")[0][0]
+    assert new != old and new.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert not security.password_needs_rehash(new)
+    assert api.post("/auth/login", json=CREDS).status_code == 200
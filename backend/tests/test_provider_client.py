@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import base
+from app.clients.base import ProviderClient
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(base.asyncio, "sleep", sleep)
+    return delays
+
+
+def _call(outcomes: list, method: str, *args, max_retries=2):
+    """Run one client call against a panel that answers with ``outcomes`` in turn.
+
+    Each outcome is a status code or an exception to raise; the last one repeats.
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"id": "x", "used_gb": 1.5})
+
+    async def main():
+        client = ProviderClient("http://panel.invalid", "t", max_retries=max_retries, retry_backoff=0.5)
+        client._http = httpx.AsyncClient(base_url=client.base, transport=httpx.MockTransport(handler))
+        try:
+            return await getattr(client, method)(*args)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main()), len(calls)
+
+
+def test_create_user_retries_connect_errors(sleeps):
+    res, calls = _call([httpx.ConnectError("refused"), httpx.ConnectTimeout("slow"), 200],
+                       "create_user", "u1", "pw", 50.0, 30)
+    assert res == {"id": "x", "used_gb": 1.5}
+    assert calls == 3
+    assert sleeps == [0.5, 1.0]
+
+
+@pytest.mark.parametrize("outcome", [503, httpx.ReadTimeout("slow")])
+def test_create_user_does_not_retry_once_the_panel_may_have_acted(sleeps, outcome):
+    res, calls = _call([outcome], "create_user", "u1", "pw", 50.0, 30)
+    assert "error" in res
+    assert calls == 1 and sleeps == []
+
+
+def test_create_user_gives_up_on_connect_errors(sleeps):
+    res, calls = _call([httpx.ConnectError("refused")], "create_user", "u1", "pw", 50.0, 30)
+    assert res == {"error": "refused"}
+    assert calls == 3
+
+
+@pytest.mark.parametrize("outcome", [503, httpx.ReadTimeout("slow"), httpx.ConnectError("refused")])
+def test_idempotent_calls_back_off_and_give_up(sleeps, outcome):
+    res, calls = _call([outcome], "get_usage", "u1", max_retries=3)
+    assert "error" in res
+    assert calls == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_idempotent_calls_recover(sleeps):
+    res, calls = _call([502, httpx.ReadTimeout("slow"), 200], "get_usage", "u1")
+    assert res == {"username": "u1", "used_gb": 1.5}
+    assert calls == 3
+
+
+def test_client_errors_are_not_retried(sleeps):
+    res, calls = _call([404], "get_usage", "u1")
+    assert res["error"].startswith("HTTP 404")
+    assert calls == 1 and sleeps == []
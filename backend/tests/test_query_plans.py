@@ -0,0 +1,110 @@
+"""The hot queries must be answered from an index, never a full table scan.
+
+Builds a database with the real migrations and checks SQLite's
+``EXPLAIN QUERY PLAN`` for each statement.
+"""
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import migrate, models
+
+NOW = datetime(2024, 1, 1)
+
+HOT_QUERIES = {
+    "subscriptions by user": (
+        select(models.Subscription).where(models.Subscription.user_id == 1),
+        "ix_subscriptions_user_id",
+    ),
+    "subscription by id and owner": (
+        select(models.Subscription).where(models.Subscription.id == 1, models.Subscription.user_id == 1),
+        None,
+    ),
+    "orders by user, newest first": (
+        select(models.Order).where(models.Order.user_id == 1).order_by(models.Order.created_at.desc()),
+        "ix_orders_user_id_created_at",
+    ),
+    "order by idempotency key": (
+        select(models.Order).where(models.Order.user_id == 1, models.Order.idempotency_key == "k"),
+        "uq_orders_user_id_idempotency_key",
+    ),
+    "expired live refresh tokens": (
+        delete(models.RefreshToken).where(models.RefreshToken.revoked == False, models.RefreshToken.expires_at < NOW),
+        "ix_refresh_tokens_revoked_expires_at",
+    ),
+    "revoked refresh tokens": (
+        select(models.RefreshToken.id).where(models.RefreshToken.revoked == True).limit(1000),
+        "ix_refresh_tokens_revoked_expires_at",
+    ),
+    "live sessions by user, newest first": (
+        select(models.RefreshToken.id)
+        .where(models.RefreshToken.user_id == 1, models.RefreshToken.revoked == False)
+        .order_by(models.RefreshToken.id.desc()),
+        "ix_refresh_tokens_user_id",
+    ),
+    "subscriptions expiring before": (
+        select(models.Subscription.id).where(models.Subscription.expires_at < NOW),
+        "ix_subscriptions_expires_at",
+    ),
+    "subscriptions due for enforcement": (
+        select(models.Subscription.id)
+        .where(models.Subscription.status == "active", models.Subscription.next_check_at <= NOW)
+        .order_by(models.Subscription.next_check_at, models.Subscription.id)
+        .limit(500),
+        "ix_subscriptions_status_next_check_at",
+    ),
+    "active subscriptions per node": (
+        select(models.Subscription.node_id, func.count())
+        .where(models.Subscription.node_id.in_([1, 2, 3]), models.Subscription.status == "active")
+        .group_by(models.Subscription.node_id),
+        "ix_subscriptions_node_id_status",
+    ),
+    "due provision jobs": (
+        select(models.ProvisionJob.id)
+        .where(models.ProvisionJob.status == "queued", models.ProvisionJob.next_run_at <= NOW)
+        .order_by(models.ProvisionJob.next_run_at),
+        "ix_provision_jobs_status_next_run_at",
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def run():
+        await migrate.upgrade(engine)
+        await engine.dispose()
+
+    asyncio.run(run())
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+
+def explain(conn: sqlite3.Connection, stmt) -> list[str]:
+    compiled = stmt.compile(dialect=sqlite_dialect.dialect(), compile_kwargs={"render_postcompile": True})
+    params = [compiled.params[name] for name in compiled.positiontup]
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {compiled}", params)]
+
+
+def test_migrations_are_recorded(db):
+    versions = {v for (v,) in db.execute("SELECT version FROM schema_migrations")}
+    assert versions == {v for v, _, _ in migrate.discover()}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(db, name):
+    stmt, index = HOT_QUERIES[name]
+    plan = explain(db, stmt)
+    assert not any(step.startswith("SCAN") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    if index:
+        assert any(index in step for step in plan), plan
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services.rate_limiter import MemoryBackend, RateLimiter, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(evict_interval=3600)
+    return SQLiteBackend(str(tmp_path / "ratelimit.db"), evict_interval=3600)
+
+
+def test_rejects_once_the_limit_is_reached(backend):
+    assert [backend.hit("k", 3, 60, 600.0 + i) for i in range(5)] == [True, True, True, False, False]
+    assert backend.hit("other", 3, 60, 605.0)
+
+
+def test_previous_window_is_weighted_by_its_overlap(backend):
+    for i in range(4):
+        backend.hit("k", 4, 60, 600.0 + i)  # fills window 10
+    # 15s into window 11, 3/4 of window 10 still counts: 4 * 0.75 = 3 of 4 used.
+    assert backend.hit("k", 4, 60, 675.0)
+    assert not backend.hit("k", 4, 60, 675.0)
+    # Halfway through: 4 * 0.5 + 1 = 3, one more fits.
+    assert backend.hit("k", 4, 60, 690.0)
+    # Two windows later nothing carries over.
+    assert backend.hit("k", 1, 60, 800.0)
+
+
+def test_idle_keys_are_evicted(backend):
+    backend.evict_interval = 0
+    backend.hit("old", 10, 60, 600.0)
+    assert len(backend) == 1
+    backend.hit("new", 10, 60, 780.0)  # "old" expired at the end of the following window
+    assert len(backend) == 1
+
+
+def test_sqlite_counts_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    a, b = SQLiteBackend(path), SQLiteBackend(path)
+    assert a.hit("k", 2, 60, 600.0)
+    assert b.hit("k", 2, 60, 601.0)
+    assert not a.hit("k", 2, 60, 602.0)
+
+
+def test_sqlite_fails_open_when_the_store_is_unavailable(tmp_path, caplog):
+    backend = SQLiteBackend(str(tmp_path / "ratelimit.db"))
+    assert backend.hit("k", 1, 60, 600.0)
+    backend._conn().close()
+    assert backend.hit("k", 1, 60, 601.0)
+    assert "rate limit store unavailable" in caplog.text
+
+
+def test_limiter_keys_are_namespaced_and_run_off_the_loop(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "ratelimit.db"))
+    login, ip = RateLimiter("login", 2, 60, backend), RateLimiter("ip", 2, 60, backend)
+
+    async def main():
+        return [await login.hit("1.2.3.4") for _ in range(3)], await ip.hit("1.2.3.4")
+
+    assert asyncio.run(main()) == ([True, True, False], True)
@@ -0,0 +1,46 @@
+from app.config import settings
+from app.security import decode_token
+from conftest import bearer, signup, sql
+
+CREDS = {"email": "sessions@example.com", "password": "test-password"}
+
+
+def _refresh(api, token):
+    return api.post("/auth/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_the_token(api):
+    first = signup(api, CREDS["email"])["refresh_token"]
+    res = _refresh(api, first)
+    assert res.status_code == 200
+    second = res.json()["refresh_token"]
+    assert second != first
+    assert _refresh(api, first).status_code == 401  # already used
+    assert _refresh(api, second).status_code == 200
+
+
+def test_logout_revokes_the_token(api):
+    token = signup(api, CREDS["email"])["refresh_token"]
+    assert api.post("/auth/logout", json={"refresh_token": token}).status_code == 200
+    assert _refresh(api, token).status_code == 401
+
+
+def test_login_keeps_at_most_the_session_cap(api, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_MAX_SESSIONS", 3)
+    signup(api, CREDS["email"])
+    tokens = [api.post("/auth/login", json=CREDS).json()["refresh_token"] for _ in range(5)]
+    assert sql("SELECT COUNT(*) FROM refresh_tokens WHERE revoked = 0") == [(3,)]
+    assert [_refresh(api, t).status_code for t in tokens[:2]] == [401, 401]  # oldest sessions dropped
+    assert _refresh(api, tokens[-1]).status_code == 200
+
+
+def test_purge_removes_revoked_and_expired_rows(api):
+    live = signup(api, CREDS["email"])["refresh_token"]
+    used = api.post("/auth/login", json=CREDS).json()["refresh_token"]
+    _refresh(api, used)
+    admin = bearer(signup(api, "admin@example.com", admin=True))
+    sql("UPDATE refresh_tokens SET expires_at = '2000-01-01 00:00:00' WHERE jti = ?", decode_token(live)["jti"])
+    before = sql("SELECT COUNT(*) FROM refresh_tokens")[0][0]
+    assert api.post("/admin/refresh-tokens/purge", headers=admin).json()["purged"] == 2
+    assert sql("SELECT COUNT(*) FROM refresh_tokens") == [(before - 2,)]
+    assert _refresh(api, live).status_code == 401
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.database import SerializedWriteSession, _write_lock, engine
+from conftest import run
+
+Session = async_sessionmaker(engine, class_=SerializedWriteSession, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def plan_id(database):
+    async def seed():
+        async with Session() as db:
+            plan = models.Plan(name="serial", price=1.0)
+            db.add(plan)
+            await db.commit()
+            return plan.id
+
+    return run(seed())
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, params, context, executemany):
+        seen.append(statement.split()[0])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_writers_wait_for_each_other(plan_id, statements):
+    async def main():
+        first_wrote, release = asyncio.Event(), asyncio.Event()
+
+        async def first():
+            async with Session() as db:
+                await db.execute(text("UPDATE plans SET price = 2 WHERE id = :id"), {"id": plan_id})
+                first_wrote.set()
+                await release.wait()
+                await db.commit()
+
+        async def second():
+            async with Session() as db:
+                # scalar() and text() DML both go through the lock
+                price = await db.scalar(update(models.Plan).where(models.Plan.id == plan_id)
+                                        .values(price=models.Plan.price + 1).returning(models.Plan.price))
+                await db.commit()
+                return price
+
+        task = asyncio.create_task(first())
+        await first_wrote.wait()
+        waiting = asyncio.create_task(second())
+        await asyncio.sleep(0.05)
+        blocked = statements.count("UPDATE") == 1 and not waiting.done()
+        release.set()
+        await task
+        return blocked, await waiting
+
+    blocked, price = run(main())
+    assert blocked
+    assert price == 3
+
+
+@pytest.mark.parametrize("end", ["commit", "rollback", "close"])
+def test_lock_is_released_when_the_transaction_ends(plan_id, end):
+    async def main():
+        db = Session()
+        await db.execute(text("UPDATE plans SET price = 5 WHERE id = :id"), {"id": plan_id})
+        held = _write_lock().locked()
+        await getattr(db, end)()
+        released = not _write_lock().locked()
+        await db.close()
+        return held, released
+
+    assert run(main()) == (True, True)
+
+
+def test_lock_is_released_after_errors(plan_id):
+    async def main():
+        with pytest.raises(RuntimeError):
+            async with Session() as db:
+                db.add(models.Plan(name="boom", price=1.0))
+                await db.flush()
+                raise RuntimeError
+        after_raise = not _write_lock().locked()
+
+        async with Session() as db:
+            db.add(models.Plan(name="serial", price=1.0))  # duplicate name
+            with pytest.raises(Exception):
+                await db.commit()
+            after_failed_commit = not _write_lock().locked()
+        return after_raise, after_failed_commit
+
+    assert run(main()) == (True, True)
+
+
+def test_reads_do_not_take_the_lock(plan_id):
+    async def main():
+        async with Session() as db:
+            await db.get(models.Plan, plan_id)
+            await db.scalar(text("SELECT COUNT(*) FROM plans"))
+            return _write_lock().locked()
+
+    assert run(main()) is False
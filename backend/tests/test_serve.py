@@ -0,0 +1,50 @@
+from app import serve
+from app.config import settings
+
+
+def test_several_workers_share_the_rate_limiter(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    serve.prepare_rate_limits(1)
+    assert settings.RATE_LIMIT_BACKEND == "memory"
+    serve.prepare_rate_limits(4)
+    assert settings.RATE_LIMIT_BACKEND == "sqlite"
+    assert serve.os.environ["RATE_LIMIT_BACKEND"] == "sqlite"  # inherited by the workers
+
+
+def test_worker_count_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_MAX_WORKERS", 2)
+    assert serve.worker_count(3) == 3  # an explicit count wins
+    assert 1 <= serve.worker_count(0) <= 2
+
+
+def test_workers_skip_the_startup_work_the_launcher_did(monkeypatch):
+    calls = []
+
+    async def initialize():
+        calls.append("initialize")
+
+    monkeypatch.setattr(serve, "initialize", initialize)
+    monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: calls.append("run"))
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.delenv("WEB_PREINITIALIZED", raising=False)
+    serve.main(["--workers", "2", "--skip-init"])
+    assert "WEB_PREINITIALIZED" not in serve.os.environ
+    serve.main(["--workers", "2"])
+    assert calls == ["run", "initialize", "run"]
+    assert serve.os.environ["WEB_PREINITIALIZED"] == "true"
+
+
+def test_preinitialized_lifespan_skips_migration_check_and_seeding(database, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    async def unexpected(*args):
+        raise AssertionError("ran in a pre-initialized worker")
+
+    monkeypatch.setattr(settings, "WEB_PREINITIALIZED", True)
+    monkeypatch.setattr(main, "ensure_current", unexpected)
+    monkeypatch.setattr(main, "seed_default_plans", unexpected)
+    with TestClient(main.app) as client:
+        assert client.get("/catalog/plans").json() == []  # nothing seeded
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from app.services import usage_cache as usage_cache_module
+from app.services.usage_cache import UsageCache
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.used_gb = 1.0
+        self.fail = False
+        self.gate: asyncio.Event | None = None
+
+    async def get_usage(self, username):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            return {"error": "HTTP 502"}
+        return {"username": username, "used_gb": self.used_gb}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(usage_cache_module, "get_client", lambda provider, node_id=None: fake)
+    return fake
+
+
+def _age(cache: UsageCache, seconds: float):
+    for key, (ts, value) in list(cache._entries.items()):
+        cache._entries[key] = (ts - seconds, value)
+
+
+def test_fresh_entry_is_served_from_cache(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        first = await cache.get("marzban", "alice")
+        second = await cache.get("marzban", "alice")
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == {"username": "alice", "used_gb": 1.0}
+    assert client.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_are_per_node(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        await cache.get("marzban", "alice", node_id=1)
+        await cache.get("marzban", "alice", node_id=2)
+
+    asyncio.run(main())
+    assert client.calls == 2
+
+
+def test_concurrent_misses_share_one_call(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        client.gate = asyncio.Event()
+        pending = [asyncio.create_task(cache.get("marzban", "alice")) for _ in range(20)]
+        await asyncio.sleep(0)
+        client.gate.set()
+        return await asyncio.gather(*pending)
+
+    results = asyncio.run(main())
+    assert client.calls == 1
+    assert all(r["used_gb"] == 1.0 for r in results)
+    assert cache.coalesced == 19
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        await cache.get("marzban", "alice")
+        _age(cache, 45)
+        client.used_gb = 2.0
+        stale = [await cache.get("marzban", "alice") for _ in range(3)]
+        await asyncio.sleep(0)
+        fresh = await cache.get("marzban", "alice")
+        return stale, fresh
+
+    stale, fresh = asyncio.run(main())
+    assert [r["used_gb"] for r in stale] == [1.0, 1.0, 1.0]
+    assert fresh["used_gb"] == 2.0
+    assert client.calls == 2
+    assert cache.stale_hits == 3
+
+
+def test_expired_entry_is_refetched(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        await cache.get("marzban", "alice")
+        _age(cache, 120)
+        client.used_gb = 3.0
+        return await cache.get("marzban", "alice")
+
+    assert asyncio.run(main())["used_gb"] == 3.0
+    assert client.calls == 2
+    assert cache.misses == 2
+
+
+def test_errors_are_not_cached(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+    client.fail = True
+
+    async def main():
+        first = await cache.get("marzban", "alice")
+        client.fail = False
+        return first, await cache.get("marzban", "alice")
+
+    first, second = asyncio.run(main())
+    assert "error" in first and second["used_gb"] == 1.0
+    assert client.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=2)
+
+    async def main():
+        await cache.get("marzban", "a")
+        await cache.get("marzban", "b")
+        await cache.get("marzban", "a")  # a is now the most recent
+        await cache.get("marzban", "c")
+        await cache.get("marzban", "a")
+        await cache.get("marzban", "b")
+
+    asyncio.run(main())
+    assert client.calls == 4  # a, b, c, then b again after it was evicted
+    assert len(cache._entries) == 2
+
+
+def test_invalidate_forces_a_fetch(client):
+    cache = UsageCache(ttl=30, stale_ttl=60, max_entries=10)
+
+    async def main():
+        await cache.get("marzban", "alice", node_id=1)
+        cache.invalidate("marzban", "alice", node_id=1)
+        await cache.get("marzban", "alice", node_id=1)
+
+    asyncio.run(main())
+    assert client.calls == 2
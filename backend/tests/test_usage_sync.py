@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.database import SessionLocal
+from app.services import usage_sync
+from conftest import run
+
+
+class FakeClient:
+    def __init__(self, usages):
+        self.usages = usages
+        self.calls = []
+
+    async def get_usages(self, usernames, concurrency=10):
+        self.calls.append(list(usernames))
+        return {u: self.usages[u] for u in usernames if u in self.usages}  # missing: the lookup failed
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    calls = []
+    write = usage_sync._write_usage
+
+    async def counted(rows, over_quota, now):
+        calls.append([r["id"] for r in rows])
+        await write(rows, over_quota, now)
+
+    monkeypatch.setattr(usage_sync, "_write_usage", counted)
+    return calls
+
+
+async def _seed(*usernames) -> dict[str, int]:
+    later = datetime.utcnow() + timedelta(days=30)
+    async with SessionLocal() as db:
+        user = models.User(email="usage@example.com", password_hash="x")
+        plan = models.Plan(name="usage", price=1.0)
+        db.add_all([user, plan])
+        await db.flush()
+        subs = {name: models.Subscription(user_id=user.id, plan_id=plan.id, external_username=name, quota_gb=50.0,
+                                          used_gb=1.0, expires_at=later, next_check_at=later)
+                for name in usernames}
+        db.add_all(subs.values())
+        await db.commit()
+        return {name: sub.id for name, sub in subs.items()}
+
+
+async def _subs() -> dict[str, models.Subscription]:
+    async with SessionLocal() as db:
+        return {s.external_username: s for s in (await db.scalars(select(models.Subscription))).all()}
+
+
+def test_usage_is_written_in_batches(database, writes, monkeypatch):
+    client = FakeClient({"a": 5.0, "b": 10.0, "c": 60.0, "e": 2.5})
+    monkeypatch.setattr(usage_sync, "get_client", lambda provider, node_id=None: client)
+
+    async def main():
+        ids = await _seed("a", "b", "c", "d", "e")
+        started = datetime.utcnow()
+        updated = await usage_sync.sync_usage_once(batch_size=2)
+        return ids, started, updated, await _subs()
+
+    ids, started, updated, subs = run(main())
+    assert updated == 4
+    assert writes == [[ids["a"], ids["b"]], [ids["c"]], [ids["e"]]]
+    assert [len(call) for call in client.calls] == [2, 2, 1]
+    assert (subs["a"].used_gb, subs["c"].used_gb, subs["e"].used_gb) == (5.0, 60.0, 2.5)
+    assert all(subs[name].usage_synced_at >= started for name in "abce")
+
+
+def test_over_quota_rows_become_due_for_enforcement(database, monkeypatch):
+    monkeypatch.setattr(usage_sync, "get_client",
+                        lambda provider, node_id=None: FakeClient({"over": 50.0, "under": 49.9}))
+
+    async def main():
+        await _seed("over", "under")
+        await usage_sync.sync_usage_once()
+        return await _subs()
+
+    subs = run(main())
+    assert subs["over"].next_check_at == subs["over"].usage_synced_at
+    assert subs["under"].next_check_at == subs["under"].expires_at
+
+
+def test_failed_lookups_leave_the_row_alone(database, monkeypatch):
+    monkeypatch.setattr(usage_sync, "get_client", lambda provider, node_id=None: FakeClient({"ok": 3.0}))
+
+    async def main():
+        await _seed("ok", "failed")
+        await usage_sync.sync_usage_once()
+        return await _subs()
+
+    subs = run(main())
+    failed = subs["failed"]
+    assert (failed.used_gb, failed.usage_synced_at, failed.next_check_at) == (1.0, None, failed.expires_at)
+    assert subs["ok"].used_gb == 3.0
@@ -101,6 +101,7 @@ DATABASE_URL=sqlite:///./vpnpanel.db
 JWT_SECRET=${JWT_SECRET}
 JWT_ALGORITHM=HS256
 ACCESS_TOKEN_EXPIRE_MINUTES=30
+ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES=5
 REFRESH_TOKEN_EXPIRE_DAYS=7
 MARZBAN_API_URL=
 MARZBAN_TOKEN=
@@ -131,9 +132,13 @@ Type=simple
 User=${SYSTEM_USER}
 WorkingDirectory=${INSTALL_DIR}/src/backend
 Environment=PATH=${INSTALL_DIR}/src/backend/.venv/bin
-ExecStart=${INSTALL_DIR}/src/backend/.venv/bin/uvicorn app.main:app --host ${BACKEND_HOST} --port ${BACKEND_PORT}
+# Migrates and seeds once, then forks one worker per CPU (WEB_* settings in .env)
+ExecStart=${INSTALL_DIR}/src/backend/.venv/bin/python -m app.serve --host ${BACKEND_HOST} --port ${BACKEND_PORT}
 Restart=on-failure
 RestartSec=3
+# SIGTERM to the launcher only; it drains workers for WEB_GRACEFUL_TIMEOUT_SECONDS
+KillMode=mixed
+TimeoutStopSec=45
 
 # Hardening
 NoNewPrivileges=true